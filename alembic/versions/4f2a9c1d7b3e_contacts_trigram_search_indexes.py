@@ -0,0 +1,37 @@
+"""Contacts trigram search indexes
+
+Revision ID: 4f2a9c1d7b3e
+Revises: cb9e366a1eaf
+Create Date: 2026-10-18 10:12:31.408213
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f2a9c1d7b3e"
+down_revision: Union[str, Sequence[str], None] = "cb9e366a1eaf"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ("first_name", "last_name", "email")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in SEARCH_COLUMNS:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_contacts_{column}_trgm "
+            f"ON contacts USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in SEARCH_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_contacts_{column}_trgm")
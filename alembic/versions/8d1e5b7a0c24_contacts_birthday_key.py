@@ -0,0 +1,40 @@
+"""Contacts birthday key
+
+Revision ID: 8d1e5b7a0c24
+Revises: 4f2a9c1d7b3e
+Create Date: 2026-10-18 11:03:52.119604
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d1e5b7a0c24"
+down_revision: Union[str, Sequence[str], None] = "4f2a9c1d7b3e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE contacts ADD COLUMN IF NOT EXISTS birthday_md INTEGER")
+    op.execute(
+        "UPDATE contacts SET birthday_md = "
+        "EXTRACT(MONTH FROM date_of_birth)::int * 100 "
+        "+ EXTRACT(DAY FROM date_of_birth)::int "
+        "WHERE date_of_birth IS NOT NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_contacts_owner_birthday_md "
+        "ON contacts (owner_id, birthday_md)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_owner_birthday_md", table_name="contacts")
+    op.drop_column("contacts", "birthday_md")
@@ -0,0 +1,35 @@
+"""Contacts owner/name index
+
+Revision ID: b6f3d2a9e471
+Revises: 8d1e5b7a0c24
+Create Date: 2026-10-18 14:22:07.503118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b6f3d2a9e471"
+down_revision: Union[str, Sequence[str], None] = "8d1e5b7a0c24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокує запис у таблицю, але не працює в транзакції
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_contacts_owner_name "
+            "ON contacts (owner_id, last_name, first_name, id)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_contacts_owner_name")
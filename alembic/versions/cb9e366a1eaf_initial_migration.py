@@ -21,31 +21,50 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_index(op.f("ix_contacts_email"), table_name="contacts")
-    op.drop_index(op.f("ix_contacts_id"), table_name="contacts")
-    op.drop_table("contacts")
-    # ### end Alembic commands ###
+    # Базова схема (раніше її створював create_all під час старту);
+    # таблиці, створені тоді, лишаються як є
+    if op.get_context().as_sql:
+        tables = []
+    else:
+        tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if "users" not in tables:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("email", sa.String(length=200), nullable=False),
+            sa.Column("full_name", sa.String(length=200), nullable=True),
+            sa.Column("hashed_password", sa.String(length=255), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("is_verified", sa.Boolean(), nullable=True),
+            sa.Column("avatar_url", sa.String(length=512), nullable=True),
+            sa.Column("verification_token", sa.String(length=255), nullable=True),
+            sa.Column("role", sa.Enum("user", "admin", name="role"), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_users_id"), "users", ["id"], unique=False)
+        op.create_index(op.f("ix_users_email"), "users", ["email"], unique=True)
+
+    if "contacts" not in tables:
+        op.create_table(
+            "contacts",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("first_name", sa.String(length=100), nullable=False),
+            sa.Column("last_name", sa.String(length=100), nullable=False),
+            sa.Column("email", sa.String(length=200), nullable=False),
+            sa.Column("phone", sa.String(length=50), nullable=False),
+            sa.Column("date_of_birth", sa.Date(), nullable=False),
+            sa.Column("information", sa.String(), nullable=True),
+            sa.Column("owner_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["owner_id"], ["users.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_contacts_id"), "contacts", ["id"], unique=False)
+        op.create_index(op.f("ix_contacts_email"), "contacts", ["email"], unique=True)
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.create_table(
-        "contacts",
-        sa.Column("id", sa.INTEGER(), autoincrement=True, nullable=False),
-        sa.Column(
-            "first_name", sa.VARCHAR(length=100), autoincrement=False, nullable=False
-        ),
-        sa.Column(
-            "last_name", sa.VARCHAR(length=100), autoincrement=False, nullable=False
-        ),
-        sa.Column("email", sa.VARCHAR(length=200), autoincrement=False, nullable=False),
-        sa.Column("phone", sa.VARCHAR(length=50), autoincrement=False, nullable=False),
-        sa.Column("date_of_birth", sa.DATE(), autoincrement=False, nullable=False),
-        sa.Column("information", sa.VARCHAR(), autoincrement=False, nullable=True),
-        sa.PrimaryKeyConstraint("id", name=op.f("contacts_pkey")),
-    )
-    op.create_index(op.f("ix_contacts_id"), "contacts", ["id"], unique=False)
-    op.create_index(op.f("ix_contacts_email"), "contacts", ["email"], unique=True)
-    # ### end Alembic commands ###
+    op.drop_table("contacts")
+    op.drop_table("users")
+    sa.Enum(name="role").drop(op.get_bind(), checkfirst=True)
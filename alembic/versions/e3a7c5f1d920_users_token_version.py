@@ -0,0 +1,33 @@
+"""Users token version
+
+Revision ID: e3a7c5f1d920
+Revises: b6f3d2a9e471
+Create Date: 2026-10-18 16:40:31.284507
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e3a7c5f1d920"
+down_revision: Union[str, Sequence[str], None] = "b6f3d2a9e471"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Константний DEFAULT у PostgreSQL 11+ не переписує таблицю
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "token_version")
@@ -0,0 +1,214 @@
+from .redis_client import get_redis_client, redis_errors
+from .contacts_version import get_contacts_version
+from collections import OrderedDict
+from datetime import date
+from config import get_settings
+from schemas import ContactOut
+import asyncio
+import crud
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Версія формату запису: при зміні ContactOut збільшуємо, старі ключі ігноруються
+CACHE_VERSION = 1
+
+# L1: LRU у пам'яті воркера
+_local: OrderedDict = OrderedDict()
+
+# Промахи, що зараз завантажуються з БД: ключ -> Future з результатом
+_inflight: dict = {}
+
+_stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+
+def _cache_key(owner_id: int, generation: str, name: str, params: dict) -> str:
+    args = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    return f"contacts:v{CACHE_VERSION}:{owner_id}:{generation}:{name}:{args}"
+
+
+def _remember(key: str, value):
+    _local[key] = value
+    _local.move_to_end(key)
+    while len(_local) > get_settings().CONTACT_CACHE_L1_SIZE:
+        _local.popitem(last=False)
+
+
+def _dump_contacts(contacts) -> list[dict]:
+    return [ContactOut.model_validate(c).model_dump(mode="json") for c in contacts]
+
+
+def _load_contacts(data: list[dict]) -> list[ContactOut]:
+    return [ContactOut.model_validate(item) for item in data]
+
+
+async def _read_l2(key: str):
+    try:
+        raw = await get_redis_client().get(key)
+    except redis_errors() as e:
+        _stats["errors"] += 1
+        logger.warning("Contact cache read failed: %s", e)
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def _write_l2(key: str, data):
+    try:
+        await get_redis_client().set(
+            key, json.dumps(data), ex=get_settings().CONTACT_CACHE_TTL
+        )
+    except redis_errors() as e:
+        _stats["errors"] += 1
+        logger.warning("Contact cache write failed: %s", e)
+
+
+async def get_or_load(owner_id: int, name: str, params: dict, loader, decode):
+    """
+
+    Read-through кеш результатів читання контактів: L1 (LRU воркера) → L2 (Redis) → БД.
+
+    Ключ містить покоління контактів власника, яке crud збільшує при кожній
+    зміні, тож старі записи просто перестають читатися. Одночасні промахи
+    за тим самим ключем чекають на один запит до БД.
+
+    :param owner_id: Ідентифікатор власника контактів
+    :param name: Назва запиту (частина ключа)
+    :param params: Параметри запиту (частина ключа)
+    :param loader: Корутина без аргументів, що повертає JSON-сумісні дані
+    :param decode: Перетворення даних на результат (його й зберігає L1)
+    :return: Результат з кешу або з ``loader``
+
+    """
+    generation = await get_contacts_version(owner_id)
+    if generation is None:
+        # Redis недоступний — без покоління кеш міг би віддати застарілі дані
+        return decode(await loader())
+
+    key = _cache_key(owner_id, generation, name, params)
+    if key in _local:
+        _stats["l1_hits"] += 1
+        _local.move_to_end(key)
+        return _local[key]
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        _stats["coalesced"] += 1
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # Скасовано запит, що завантажував дані, а не цей — читаємо самі
+            return decode(await loader())
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        data = await _read_l2(key)
+        if data is not None:
+            _stats["l2_hits"] += 1
+        else:
+            _stats["misses"] += 1
+            data = await loader()
+            await _write_l2(key, data)
+        result = decode(data)
+        _remember(key, result)
+        future.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Позначаємо помилку отриманою, якщо ніхто не чекав на цей ключ
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+async def list_contacts_page(db, user_id: int, cursor=None, limit=None, **filters):
+    """Кешована ``crud.list_contacts_page``"""
+    limit = limit or crud.DEFAULT_PAGE_SIZE
+
+    async def load():
+        contacts, next_cursor, prev_cursor = await crud.list_contacts_page(
+            db, user_id=user_id, cursor=cursor, limit=limit, **filters
+        )
+        return {
+            "contacts": _dump_contacts(contacts),
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+    def decode(data):
+        return (
+            _load_contacts(data["contacts"]),
+            data["next_cursor"],
+            data["prev_cursor"],
+        )
+
+    params = {"cursor": cursor, "limit": limit, **filters}
+    return await get_or_load(user_id, "page", params, load, decode)
+
+
+async def search_contacts(db, query: str, user_id: int):
+    """Кешована ``crud.search_contacts``"""
+    async def load():
+        return _dump_contacts(await crud.search_contacts(db, query, user_id))
+
+    return await get_or_load(user_id, "search", {"q": query}, load, _load_contacts)
+
+
+def _birthdays_params(days: int, today: date) -> dict:
+    return {"days": days, "today": today.isoformat()}
+
+
+async def upcoming_birthdays(db, user_id: int, days: int = 7):
+    """Кешована ``crud.upcoming_birthdays`` (ключ містить поточну дату)"""
+    async def load():
+        return _dump_contacts(await crud.upcoming_birthdays(db, user_id, days))
+
+    params = _birthdays_params(days, date.today())
+    return await get_or_load(user_id, "birthdays", params, load, _load_contacts)
+
+
+async def store_upcoming_birthdays(
+    owner_id: int, generation: str, contacts, days: int, today: date, ttl: int
+):
+    """
+
+    Запис заздалегідь обчислених днів народження в L2 під ключем
+    ``upcoming_birthdays``: сторінка читає їх без запиту до БД, доки
+    покоління контактів власника не зміниться.
+
+    """
+    params = _birthdays_params(days, today)
+    key = _cache_key(owner_id, generation, "birthdays", params)
+    try:
+        data = json.dumps(_dump_contacts(contacts))
+        await get_redis_client().set(key, data, ex=ttl)
+    except redis_errors() as e:
+        _stats["errors"] += 1
+        logger.warning("Contact cache write failed: %s", e)
+
+
+async def fragment_key(owner_id: int, name: str, params: dict) -> str | None:
+    """
+
+    Ключ ``{% cache %}`` для фрагмента шаблону з контактами власника.
+
+    Містить покоління контактів, тож зміна контактів робить фрагмент
+    недійсним; None (Redis недоступний) — фрагмент рендериться без кешу.
+
+    """
+    generation = await get_contacts_version(owner_id)
+    if generation is None:
+        return None
+    return _cache_key(owner_id, generation, f"fragment:{name}", params)
+
+
+def get_cache_stats() -> dict:
+    """Лічильники влучань/промахів кешу контактів"""
+    return dict(_stats, l1_size=len(_local))
@@ -0,0 +1,70 @@
+from .redis_client import get_redis_client, redis_errors
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _version_key(owner_id: int) -> str:
+    return f"contacts:ver:{owner_id}"
+
+
+async def get_contacts_version(owner_id: int) -> str | None:
+    """
+    Поточна версія контактів користувача (для ETag).
+
+    Відсутній ключ (перший запит або витіснення з Redis) ініціалізується
+    часом у наносекундах, тож нова версія не збігається з виданими раніше.
+    None — Redis недоступний, ETag не використовується.
+
+    """
+    key = _version_key(owner_id)
+    try:
+        redis = get_redis_client()
+        version = await redis.get(key)
+        if version is None:
+            await redis.set(key, time.time_ns(), nx=True)
+            version = await redis.get(key)
+    except redis_errors() as e:
+        logger.warning("Contacts version read failed: %s", e)
+        return None
+    if isinstance(version, bytes):
+        version = version.decode()
+    return version
+
+
+async def bump_contacts_version(owner_id: int):
+    """Нова версія контактів користувача після будь-якої зміни"""
+    key = _version_key(owner_id)
+    try:
+        async with get_redis_client().pipeline(transaction=True) as pipe:
+            # INCR по відсутньому ключу почав би з 1 і міг би повторити стару версію
+            pipe.set(key, time.time_ns(), nx=True)
+            pipe.incr(key)
+            await pipe.execute()
+    except redis_errors() as e:
+        logger.error("Contacts version bump failed for user %s: %s", owner_id, e)
+
+
+async def get_contacts_versions(owner_ids: list[int]) -> dict[int, str]:
+    """Версії контактів кількох користувачів (MGET); порожньо, якщо Redis недоступний"""
+    if not owner_ids:
+        return {}
+    keys = [_version_key(owner_id) for owner_id in owner_ids]
+    try:
+        redis = get_redis_client()
+        values = await redis.mget(keys)
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if missing:
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in missing:
+                    pipe.set(key, time.time_ns(), nx=True)
+                await pipe.execute()
+            values = await redis.mget(keys)
+    except redis_errors() as e:
+        logger.warning("Contacts versions read failed: %s", e)
+        return {}
+    return {
+        owner_id: value.decode() if isinstance(value, bytes) else value
+        for owner_id, value in zip(owner_ids, values)
+    }
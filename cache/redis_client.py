@@ -1,5 +1,6 @@
-import redis.asyncio as redis
 from config import get_settings
+from services.metrics import observe_redis
+import time
 
 
 # Example of incorrect Redis client initialization:
@@ -13,9 +14,41 @@ from config import get_settings
 
 _redis_client = None
 
+
+def _instrumented_redis_class():
+    # redis імпортується при створенні клієнта, а не під час старту застосунку
+    import redis.asyncio as redis
+
+    class InstrumentedRedis(redis.Redis):
+        """Клієнт Redis, що вимірює кожен round-trip для /metrics"""
+
+        async def execute_command(self, *args, **options):
+            start = time.perf_counter()
+            try:
+                return await super().execute_command(*args, **options)
+            finally:
+                observe_redis(args[0], time.perf_counter() - start)
+
+    return InstrumentedRedis
+
+
 def get_redis_client():
     global _redis_client
     if _redis_client is None:
         settings = get_settings() 
-        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+        _redis_client = _instrumented_redis_class().from_url(settings.REDIS_URL)
     return _redis_client
+
+
+def redis_errors() -> tuple:
+    """
+
+    Винятки недоступного Redis для ``except redis_errors():``.
+
+    Вираз у except обчислюється лише коли виняток уже виник, тож модулі
+    кешу не імпортують redis під час старту.
+
+    """
+    from redis.exceptions import RedisError
+
+    return (RedisError, OSError)
@@ -0,0 +1,83 @@
+from .redis_client import get_redis_client, redis_errors
+from collections import OrderedDict
+from config import get_settings
+from models import User
+from sqlalchemy import select
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Версія видаленого користувача: жоден токен їй не відповідає
+DELETED = -1
+
+# Локальна копія версій: user_id -> (версія, до якого моменту довіряємо)
+LOCAL_CACHE_SIZE = 10_000
+_local: "OrderedDict[int, tuple[int, float]]" = OrderedDict()
+
+
+def _version_key(user_id: int) -> str:
+    return f"user:tv:{user_id}"
+
+
+def _redis_ttl() -> int:
+    # Після цього часу всі токени зі старою версією однаково прострочені
+    return get_settings().ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+def _remember(user_id: int, version: int):
+    _local[user_id] = (version, time.monotonic() + get_settings().TOKEN_VERSION_CACHE_SECONDS)
+    _local.move_to_end(user_id)
+    if len(_local) > LOCAL_CACHE_SIZE:
+        _local.popitem(last=False)
+
+
+async def get_token_version(db, user_id: int) -> int | None:
+    """
+    Поточна версія токенів користувача.
+
+    Локальна копія (TOKEN_VERSION_CACHE_SECONDS) → Redis → БД; значення з БД
+    записується в Redis, поки воно там відсутнє. None — користувача немає.
+
+    """
+    cached = _local.get(user_id)
+    if cached is not None and cached[1] > time.monotonic():
+        version = cached[0]
+        return None if version == DELETED else version
+
+    redis = get_redis_client()
+    raw = None
+    try:
+        raw = await redis.get(_version_key(user_id))
+    except redis_errors() as e:
+        redis = None
+        logger.warning("Token version read failed: %s", e)
+
+    if raw is not None:
+        version = int(raw)
+    else:
+        version = await db.scalar(select(User.token_version).where(User.id == user_id))
+        if version is None:
+            version = DELETED
+        if redis is not None:
+            try:
+                await redis.set(_version_key(user_id), version, nx=True, ex=_redis_ttl())
+            except redis_errors() as e:
+                logger.warning("Token version write failed: %s", e)
+
+    _remember(user_id, version)
+    return None if version == DELETED else version
+
+
+async def set_token_version(user_id: int, version: int | None):
+    """Публікація нової версії (None — користувача видалено) для всіх воркерів"""
+    _local.pop(user_id, None)
+    try:
+        await get_redis_client().set(
+            _version_key(user_id),
+            DELETED if version is None else version,
+            ex=_redis_ttl(),
+        )
+    except redis_errors() as e:
+        # Інші воркери побачать нову версію після закінчення TTL ключа в Redis
+        logger.error("Token version publish failed for user %s: %s", user_id, e)
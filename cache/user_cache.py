@@ -1,23 +1,91 @@
-from .redis_client import get_redis_client
+from .redis_client import get_redis_client, redis_errors
+from config import get_settings
+from models import User, Role
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Версія формату запису: при зміні полів збільшуємо, старі ключі ігноруються
+CACHE_VERSION = 1
+
+# Поля користувача, які зберігаються в кеші (без хешу пароля)
+CACHED_FIELDS = ("id", "email", "full_name", "is_active", "is_verified", "avatar_url")
+
+# Лічильники влучань/промахів кешу
+_stats = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def _user_key(user_id: int) -> str:
+    return f"user:v{CACHE_VERSION}:{user_id}"
+
+
+def serialize_user(user) -> str:
+    """Серіалізація користувача для Redis"""
+    data = {field: getattr(user, field) for field in CACHED_FIELDS}
+    role = user.role
+    data["role"] = role.value if isinstance(role, Role) else role
+    data["v"] = CACHE_VERSION
+    return json.dumps(data)
+
+
+def deserialize_user(raw) -> User | None:
+    """Відновлення користувача з Redis (від'єднаний від сесії екземпляр User)"""
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.pop("v", None) != CACHE_VERSION:
+        return None
+    role = data.pop("role", None)
+    return User(**data, role=Role(role) if role else None)
 
 
 async def cache_user(user):
     """Заносимо користувача в Redis"""
-    key = f"user:{user.id}"
-    user_data = {"id": user.id, "email": user.email, "is_active": user.is_active}
-    redis = await get_redis_client()
-    await redis.set(key, json.dumps(user_data), ex=3600)  # TTL 1 час
+    settings = get_settings()
+    try:
+        await get_redis_client().set(
+            _user_key(user.id), serialize_user(user), ex=settings.USER_CACHE_TTL
+        )
+    except redis_errors() as e:
+        _stats["errors"] += 1
+        logger.warning("User cache write failed: %s", e)
 
 
-async def get_cached_user(user_id: int):
+async def get_cached_user(user_id: int) -> User | None:
     """Беремо користувача з Redis"""
-    key = f"user:{user_id}"
-    data = await get_redis_client.get(key)
-    if data:
-        return json.loads(data)
-    return None
+    try:
+        data = await get_redis_client().get(_user_key(user_id))
+    except redis_errors() as e:
+        _stats["errors"] += 1
+        logger.warning("User cache read failed: %s", e)
+        return None
+    user = deserialize_user(data) if data else None
+    _stats["hits" if user else "misses"] += 1
+    return user
 
 
 async def delete_user_cache(user_id: int):
-    await get_redis_client.delete(f"user:{user_id}")
+    """Інвалідація кешу користувача після зміни його даних"""
+    try:
+        await get_redis_client().delete(_user_key(user_id))
+    except redis_errors() as e:
+        _stats["errors"] += 1
+        logger.warning("User cache invalidation failed: %s", e)
+
+
+async def get_or_load_user(db, user_id: int) -> User | None:
+    """Read-through: спершу Redis, при промаху — БД з подальшим кешуванням"""
+    user = await get_cached_user(user_id)
+    if user is not None:
+        return user
+    user = await db.get(User, user_id)
+    if user is not None:
+        await cache_user(user)
+    return user
+
+
+def get_cache_stats() -> dict:
+    """Лічильники влучань/промахів/помилок кешу користувачів"""
+    return dict(_stats)
@@ -4,9 +4,9 @@ from pydantic_settings import BaseSettings
 from pydantic import Field
 import os 
 
-from dotenv import load_dotenv
-env_path = ".env.test" if os.environ.get("PYTEST_CURRENT_TEST") else ".env"
-load_dotenv(dotenv_path= env_path)
+
+def _env_path() -> str:
+    return ".env.test" if os.environ.get("PYTEST_CURRENT_TEST") else ".env"
 
 # env_path =None
 # if "PYTEST_CURRENT_TEST" in os.environ:
@@ -18,7 +18,7 @@ load_dotenv(dotenv_path= env_path)
 class Settings(BaseSettings):
     # Конфигурация Pydantic V2
     model_config = ConfigDict(
-        env_file=env_path,
+        env_file=".env",
         env_file_encoding="utf-8",
     )
 
@@ -28,12 +28,30 @@ class Settings(BaseSettings):
 
     # База данных
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30  # секунди очікування вільного з'єднання
+    DB_POOL_RECYCLE: int = 1800  # секунди життя з'єднання
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # кеш prepared statements asyncpg
+    DB_SLOW_CHECKOUT_MS: float = 100  # поріг логування повільної видачі
+    DATABASE_REPLICA_URLS: str = ""  # репліки для читання, через кому
+    READ_YOUR_WRITES_SECONDS: int = 5  # читання з primary після змін
 
     # Сервер
     SERVER_PORT: int
+    SCHEMA_CHECK: bool = True  # перевірка ревізії Alembic під час старту
+    ENV: str = "development"  # "production" — шаблони не перевіряються на зміни
+
+    # Шаблони (templating.py)
+    TEMPLATE_BYTECODE_DIR: str = ""  # "" — тимчасовий каталог системи
+    FRAGMENT_CACHE_SIZE: int = 512  # фрагментів {% cache %} у пам'яті воркера
 
     # Redis
     REDIS_URL: str
+    USER_CACHE_TTL: int = 3600  # секунди
+    CONTACT_CACHE_TTL: int = 300  # секунди, L2 (Redis)
+    CONTACT_CACHE_L1_SIZE: int = 256  # записів у пам'яті воркера
 
     # JWT
     SECRET_KEY: str
@@ -44,27 +62,69 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int
     VERIFICATION_TOKEN_EXPIRE_HOURS: int = 24  # значение по умолчанию
 
+    # Пул bcrypt (0 — кількість ядер) та максимальна черга до 429
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_QUEUE: int = 64
+
     # SMTP
     SMTP_HOST: str
     SMTP_PORT: int
     SMTP_USER: str
     SMTP_PASS: str
     SECRET_EMAIL: str
+    SMTP_STARTTLS: bool = False
+
+    # Версії токенів (відкликання): скільки секунд воркер довіряє локальній копії
+    TOKEN_VERSION_CACHE_SECONDS: int = 5
+
+    # Черга відправки пошти
+    MAIL_WORKERS: int = 2
+    MAIL_POOL_SIZE: int = 2
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_MAX_RETRIES: int = 5
+    MAIL_QUEUE_SIZE: int = 1000
 
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
 
+    # Аватарки (services.avatars): "cloudinary" або "local" (без мережі)
+    AVATAR_STORAGE: str = "cloudinary"
+    AVATAR_LOCAL_DIR: str = "static/avatars"
+    AVATAR_LOCAL_URL: str = "/static/avatars"
+    AVATAR_MAX_BYTES: int = 5 * 1024 * 1024
+    AVATAR_WORKERS: int = 2  # процеси для обробки зображень
+
     # CORS
     CORS_ORIGINS: str
 
+    # Bearer-токен для /metrics (scrape Prometheus); "" — ендпоінт вимкнено
+    METRICS_TOKEN: str = ""
+
+    # Щоденне обчислення днів народження (services.scheduler)
+    SCHEDULER_ENABLED: bool = True  # False — лише окремий воркер
+    BIRTHDAY_DIGEST_HOUR: int = 6  # година запуску (час сервера)
+    BIRTHDAY_DIGEST_DAYS: int = 7
+    BIRTHDAY_SHARD_SIZE: int = 1000  # користувачів (діапазон ID) на шард
+    BIRTHDAY_DIGEST_EMAILS: bool = False  # надсилати листи-дайджести
+
+    # Rate limit: "" — пам'ять воркера, "budget+redis://host:6379/1" — спільний Redis
+    RATE_LIMIT_STORAGE_URI: str = ""
+    RATE_LIMIT_LOCAL_RATIO: float = 0.1  # частка ліміту без звернення до Redis
+    TRUSTED_PROXY_HOPS: int = 0  # кількість довірених проксі перед застосунком
+
 
 # default_settings = Settings()
 
 @lru_cache
 def get_settings() -> Settings:
-    return Settings()
+    # .env читається при першому зверненні, а не під час імпорту модуля
+    from dotenv import load_dotenv
+
+    env_path = _env_path()
+    load_dotenv(dotenv_path=env_path)
+    return Settings(_env_file=env_path)
 
 
 
@@ -1,11 +1,62 @@
 from fastapi import HTTPException
-from sqlalchemy import select, or_, update, delete
+from sqlalchemy import (
+    select,
+    or_,
+    update,
+    delete,
+    tuple_,
+    func,
+    case,
+    any_,
+    bindparam,
+    Integer,
+)
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime, timedelta
-from models import Contact, User
-from schemas import ContactCreate, ContactUpdate
-from typing import List, Optional
+from calendar import isleap
+from models import Contact, User, birthday_key
+from cache.user_cache import delete_user_cache
+from cache.token_version import set_token_version
+from cache.contacts_version import bump_contacts_version
+from schemas import ContactCreate, ContactUpdate, ContactSelection
+from typing import AsyncIterator, List, Optional, Tuple
+import base64
+import binascii
+import json
+
+# Пагінація списку контактів (keyset)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Максимальна кількість результатів пошуку
+SEARCH_LIMIT = 50
+
+# Розмір пачки рядків при потоковому експорті
+EXPORT_BATCH_SIZE = 1000
+
+# Кількість ID в одному пакетному UPDATE/DELETE
+BULK_CHUNK_SIZE = 1000
+
+# Ключ дня народження 29 лютого (див. models.birthday_key)
+FEB_29_KEY = 229
+
+# SQLSTATE порушення унікальності (PostgreSQL)
+UNIQUE_VIOLATION = "23505"
+
+
+def _contact_integrity_error(error: IntegrityError) -> HTTPException:
+    """400 для помилки обмеження: дубль email окремо від інших порушень"""
+    orig = error.orig
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    # SQLite (тести) не має SQLSTATE — лише текст помилки
+    unique = code == UNIQUE_VIOLATION if code else "UNIQUE" in str(orig).upper()
+    if unique:
+        return HTTPException(
+            status_code=400, detail="Contact with this email already exists."
+        )
+    return HTTPException(status_code=400, detail="Invalid contact data.")
 
 
 async def create_contact(
@@ -29,28 +80,158 @@ async def create_contact(
     try:
         await db.commit()
         await db.refresh(db_obj)
-    except IntegrityError:
+    except IntegrityError as e:
         await db.rollback()
-        raise HTTPException(
-            status_code=400, detail="Contact with this email already exists."
-        )
+        raise _contact_integrity_error(e)
+    await bump_contacts_version(owner_id)
     return db_obj
 
 
-async def get_contact(db: AsyncSession, contact_id: int) -> Optional[Contact]:
+async def import_contacts(
+    db: AsyncSession,
+    contacts: List[ContactCreate],
+    owner_id: int,
+    overwrite: bool = False,
+) -> set[str]:
+    """
+
+    Пакетна вставка контактів багаторядковим INSERT ... ON CONFLICT (email).
+
+    Наявний контакт з тим самим email оновлюється лише при ``overwrite``
+    і лише якщо він належить тому ж власнику; інакше рядок пропускається.
+
+    :param db: AsyncSession SQLAlchemy
+    :param contacts: Провалідовані контакти (email без повторів)
+    :param owner_id: Ідентифікатор власника контактів
+    :param overwrite: Оновлювати наявні контакти замість пропуску
+    :return: Email контактів, які було вставлено або оновлено
+
+    """
+
+    if not contacts:
+        return set()
+
+    rows = [
+        {
+            **contact.model_dump(),
+            "owner_id": owner_id,
+            # validates() моделі не спрацьовує для Core INSERT
+            "birthday_md": birthday_key(contact.date_of_birth),
+        }
+        for contact in contacts
+    ]
+    # Core-вставка по таблиці: один скомпільований INSERT, а executemany
+    # з RETURNING SQLAlchemy розгортає в багаторядкові VALUES (insertmanyvalues)
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    table = Contact.__table__
+    stmt = dialect.insert(table)
+    if overwrite:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.email],
+            set_={key: stmt.excluded[key] for key in rows[0] if key != "owner_id"},
+            where=table.c.owner_id == stmt.excluded.owner_id,
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.email])
+
+    conn = await db.connection()
+    result = await conn.execute(stmt.returning(table.c.email), rows)
+    written = set(result.scalars())
+    await db.commit()
+    if written:
+        await bump_contacts_version(owner_id)
+    return written
+
+
+async def get_contact(
+    db: AsyncSession, contact_id: int, owner_id: Optional[int] = None
+) -> Optional[Contact]:
     """ 
     
     Отримання контакту за його ідентифікатором.
     
     :param db: AsyncSession SQLAlchemy
     :param contact_id: Ідентифікатор контакту
+    :param owner_id: Лише контакт цього власника (необов'язково)
     
     """
     
-    result = await db.execute(select(Contact).where(Contact.id == contact_id))
+    q = select(Contact).where(Contact.id == contact_id)
+    if owner_id is not None:
+        q = q.where(Contact.owner_id == owner_id)
+    result = await db.execute(q)
     return result.scalars().first()
 
 
+def _contact_filters(
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    email: Optional[str] = None,
+):
+    """
+
+    Формування умов фільтрації контактів (OR між заданими полями).
+
+    :param first_name: Фільтр за ім'ям (необов'язково)
+    :param last_name: Фільтр за прізвищем (необов'язково)
+    :param email: Фільтр за email (необов'язково)
+    :return: Список умов для ``where``
+
+    """
+
+    conditions = []
+    if first_name:
+        conditions.append(Contact.first_name.ilike(f"%{first_name}%"))
+    if last_name:
+        conditions.append(Contact.last_name.ilike(f"%{last_name}%"))
+    if email:
+        conditions.append(Contact.email.ilike(f"%{email}%"))
+    if conditions:
+        return [or_(*conditions)]
+    return []
+
+
+def encode_cursor(contact: Contact, direction: str = "next") -> str:
+    """
+
+    Кодування непрозорого курсора сторінки за ключем (last_name, first_name, id).
+
+    :param contact: Контакт на межі сторінки
+    :param direction: ``next`` — сторінка після контакту, ``prev`` — перед ним
+    :return: Курсор у вигляді base64url-рядка
+
+    """
+
+    raw = json.dumps(
+        {"d": direction, "k": [contact.last_name, contact.first_name, contact.id]},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Tuple[str, str, int]]:
+    """
+
+    Декодування курсора сторінки.
+
+    :param cursor: Курсор, отриманий з ``encode_cursor``
+    :return: Напрямок та ключ (last_name, first_name, id)
+    :raises HTTPException: 400, якщо курсор пошкоджений
+
+    """
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = data["d"]
+        last_name, first_name, contact_id = data["k"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return direction, (str(last_name), str(first_name), int(contact_id))
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 async def list_contacts(
     db: AsyncSession,
     user_id: int,
@@ -70,134 +251,471 @@ async def list_contacts(
     
     """
     
-    q = select(Contact).where(Contact.owner_id == user_id)
-
-    conditions = []
-    if first_name:
-        conditions.append(Contact.first_name.ilike(f"%{first_name}%"))
-    if last_name:
-        conditions.append(Contact.last_name.ilike(f"%{last_name}%"))
-    if email:
-        conditions.append(Contact.email.ilike(f"%{email}%"))
-    if conditions:
-        q = q.where(or_(*conditions))
+    q = (
+        select(Contact)
+        .where(Contact.owner_id == user_id)
+        .where(*_contact_filters(first_name, last_name, email))
+    )
     result = await db.execute(q.order_by(Contact.last_name, Contact.first_name))
     return result.scalars().all()
 
 
+async def stream_contacts(
+    db: AsyncSession,
+    user_id: int,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    email: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[list]:
+    """
+
+    Потокове читання контактів пачками (server-side курсор).
+
+    Вибираються лише колонки, без ORM-об'єктів, тож пам'ять не росте
+    з розміром адресної книги. Фільтри — як у ``list_contacts``.
+
+    :param db: AsyncSession SQLAlchemy
+    :param user_id: Ідентифікатор користувача
+    :param first_name: Фільтр за ім'ям (необов'язково)
+    :param last_name: Фільтр за прізвищем (необов'язково)
+    :param email: Фільтр за email (необов'язково)
+    :param batch_size: Кількість рядків у пачці
+    :return: Асинхронний ітератор списків рядків
+
+    """
+
+    q = (
+        select(
+            Contact.id,
+            Contact.first_name,
+            Contact.last_name,
+            Contact.email,
+            Contact.phone,
+            Contact.date_of_birth,
+            Contact.information,
+        )
+        .where(Contact.owner_id == user_id)
+        .where(*_contact_filters(first_name, last_name, email))
+        .order_by(Contact.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(q)
+    async for rows in result.partitions():
+        yield rows
+
+
+async def list_contacts_page(
+    db: AsyncSession,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    email: Optional[str] = None,
+) -> Tuple[List[Contact], Optional[str], Optional[str]]:
+    """
+
+    Отримання сторінки контактів з keyset-пагінацією.
+
+    Сторінки впорядковані за (last_name, first_name, id), тому запит до
+    сторінки N коштує стільки ж, скільки до першої — без OFFSET.
+
+    :param db: AsyncSession SQLAlchemy
+    :param user_id: Ідентифікатор користувача
+    :param cursor: Курсор сторінки (``None`` — перша сторінка)
+    :param limit: Розмір сторінки (не більше ``MAX_PAGE_SIZE``)
+    :param first_name: Фільтр за ім'ям (необов'язково)
+    :param last_name: Фільтр за прізвищем (необов'язково)
+    :param email: Фільтр за email (необов'язково)
+    :return: Контакти сторінки, курсор наступної та попередньої сторінок
+
+    """
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    key = tuple_(Contact.last_name, Contact.first_name, Contact.id)
+
+    q = (
+        select(Contact)
+        .where(Contact.owner_id == user_id)
+        .where(*_contact_filters(first_name, last_name, email))
+    )
+
+    direction = "next"
+    if cursor:
+        direction, boundary = decode_cursor(cursor)
+        if direction == "next":
+            q = q.where(key > tuple_(*boundary))
+        else:
+            q = q.where(key < tuple_(*boundary))
+
+    if direction == "next":
+        q = q.order_by(Contact.last_name, Contact.first_name, Contact.id)
+    else:
+        # Для попередньої сторінки йдемо у зворотному порядку і розвертаємо
+        q = q.order_by(
+            Contact.last_name.desc(), Contact.first_name.desc(), Contact.id.desc()
+        )
+
+    # Один зайвий рядок показує, чи є ще сторінка в цьому напрямку
+    result = await db.execute(q.limit(limit + 1))
+    contacts = list(result.scalars().all())
+    has_more = len(contacts) > limit
+    contacts = contacts[:limit]
+
+    if direction == "prev":
+        contacts.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+
+    next_cursor = encode_cursor(contacts[-1], "next") if contacts and has_next else None
+    prev_cursor = encode_cursor(contacts[0], "prev") if contacts and has_prev else None
+    return contacts, next_cursor, prev_cursor
+
+
 async def update_contact(
-    db: AsyncSession, contact_id: int, contact: ContactUpdate
+    db: AsyncSession, contact_id: int, contact: ContactUpdate, owner_id: int
 ) -> Optional[Contact]:
     """
     
     Оновлення інформації про контакт.
+
+    Один запит ``UPDATE ... WHERE id AND owner_id RETURNING``: без
+    попереднього SELECT і без refresh, чужий контакт не буде змінено.
     
     :param db: AsyncSession SQLAlchemy
     :param contact_id: Ідентифікатор контакту
     :param contact: Схема ContactUpdate з оновленими даними контакту
+    :param owner_id: Ідентифікатор власника контакту
+    :return: Оновлений контакт або None, якщо його немає у власника
     
     """
-    stmt = select(Contact).where(Contact.id == contact_id)
-    res = await db.execute(stmt)
-    db_obj = res.scalars().first()
-    if not db_obj:
+    data = contact.dict(exclude_unset=True)
+    if not data:
+        return await get_contact(db, contact_id, owner_id=owner_id)
+    if "date_of_birth" in data:
+        # validates() моделі не спрацьовує для Core UPDATE
+        data["birthday_md"] = birthday_key(data["date_of_birth"])
+
+    stmt = (
+        update(Contact)
+        .where(Contact.id == contact_id, Contact.owner_id == owner_id)
+        .values(**data)
+        .returning(Contact)
+        .execution_options(populate_existing=True, synchronize_session=False)
+    )
+    try:
+        result = await db.execute(stmt)
+        db_obj = result.scalars().first()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise _contact_integrity_error(e)
+    if db_obj is None:
         return None
-    for field, value in contact.dict(exclude_unset=True).items():
-        setattr(db_obj, field, value)
-    db.add(db_obj)
-    await db.commit()
-    await db.refresh(db_obj)
+    await bump_contacts_version(owner_id)
     return db_obj
 
 
-async def delete_contact(db: AsyncSession, contact_id: int) -> bool:
+async def delete_contact(db: AsyncSession, contact_id: int, owner_id: int) -> bool:
     """
     
     Видалення контакту за його ідентифікатором.
+
+    Один запит ``DELETE ... WHERE id AND owner_id RETURNING id``.
     
     :param db: AsyncSession SQLAlchemy
     :param contact_id: Ідентифікатор контакту
+    :param owner_id: Ідентифікатор власника контакту
+    :return: True, якщо контакт видалено
     
     """
     
-    stmt = select(Contact).where(Contact.id == contact_id)
-    res = await db.execute(stmt)
-    db_obj = res.scalars().first()
-    if not db_obj:
-        return False
-    await db.delete(db_obj)
+    result = await db.execute(
+        delete(Contact)
+        .where(Contact.id == contact_id, Contact.owner_id == owner_id)
+        .returning(Contact.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = result.scalar_one_or_none()
     await db.commit()
+    if deleted is None:
+        return False
+    await bump_contacts_version(owner_id)
     return True
 
 
-async def search_contacts(db: AsyncSession, query: str, user_id: int):
+def _selection_chunks(db: AsyncSession, owner_id: int, selection: ContactSelection):
+    """
+
+    Умови WHERE пакетної операції, по одній на кожну пачку ID.
+
+    На PostgreSQL пачка передається одним масивом (``id = ANY(:ids)``), тож
+    текст запиту однаковий для будь-якого розміру пачки і кешується драйвером.
+
+    """
+
+    base = [
+        Contact.owner_id == owner_id,
+        *_contact_filters(selection.first_name, selection.last_name, selection.email),
+    ]
+    if not selection.ids:
+        yield base
+        return
+
+    ids = sorted(set(selection.ids))
+    postgres = db.get_bind().dialect.name == "postgresql"
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = ids[start : start + BULK_CHUNK_SIZE]
+        if postgres:
+            condition = Contact.id == any_(
+                bindparam("ids", chunk, type_=postgresql.ARRAY(Integer))
+            )
+        else:
+            condition = Contact.id.in_(chunk)
+        yield [*base, condition]
+
+
+async def bulk_delete_contacts(
+    db: AsyncSession, owner_id: int, selection: ContactSelection
+) -> int:
+    """
+
+    Пакетне видалення контактів власника одним DELETE на пачку ID.
+
+    :param db: AsyncSession SQLAlchemy
+    :param owner_id: Ідентифікатор власника контактів
+    :param selection: ID та/або фільтри контактів
+    :return: Кількість видалених контактів
+
+    """
+
+    deleted = 0
+    for conditions in _selection_chunks(db, owner_id, selection):
+        result = await db.execute(
+            delete(Contact)
+            .where(*conditions)
+            .execution_options(synchronize_session=False)
+        )
+        deleted += result.rowcount
+    await db.commit()
+    if deleted:
+        await bump_contacts_version(owner_id)
+    return deleted
+
+
+async def bulk_update_contacts(
+    db: AsyncSession,
+    owner_id: int,
+    selection: ContactSelection,
+    values: ContactUpdate,
+) -> List[int]:
+    """
+
+    Пакетне оновлення контактів власника: UPDATE ... RETURNING id на пачку ID.
+
+    :param db: AsyncSession SQLAlchemy
+    :param owner_id: Ідентифікатор власника контактів
+    :param selection: ID та/або фільтри контактів
+    :param values: Нові значення (лише задані поля)
+    :return: Ідентифікатори оновлених контактів
+
+    """
+
+    data = values.model_dump(exclude_unset=True)
+    if "date_of_birth" in data:
+        # validates() моделі не спрацьовує для Core UPDATE
+        data["birthday_md"] = birthday_key(data["date_of_birth"])
+
+    updated = []
+    try:
+        for conditions in _selection_chunks(db, owner_id, selection):
+            result = await db.execute(
+                update(Contact)
+                .where(*conditions)
+                .values(**data)
+                .returning(Contact.id)
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.scalars().all()
+        await db.commit()
+    except IntegrityError:
+        # Жодна пачка не зберігається: оновлення або повне, або ніякого
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Invalid values for bulk update.")
+    if updated:
+        await bump_contacts_version(owner_id)
+    return updated
+
+
+async def search_contacts(
+    db: AsyncSession, query: str, user_id: int, limit: int = SEARCH_LIMIT
+):
     """
     
     Пошук контактів за ім'ям, прізвищем або email.
+
+    На PostgreSQL умови ILIKE обслуговуються триграмними GIN-індексами
+    (pg_trgm), а результати впорядковуються за релевантністю
+    (``word_similarity``). На інших БД (SQLite у тестах) — звичайний ILIKE
+    з сортуванням за прізвищем та ім'ям.
     
     :param db: AsyncSession SQLAlchemy
     :param query: Пошуковий запит
     :param user_id: Ідентифікатор користувача
+    :param limit: Максимальна кількість результатів
     
     """
     
-    like = f"%{query.lower()}%"
-    result = await db.execute(
+    # % і _ у запиті — звичайні символи, а не шаблони LIKE
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    like = f"%{escaped}%"
+    stmt = (
         select(Contact)
         .where(Contact.owner_id == user_id)
         .where(
             or_(
-                Contact.first_name.ilike(like),
-                Contact.last_name.ilike(like),
-                Contact.email.ilike(like),
+                Contact.first_name.ilike(like, escape="\\"),
+                Contact.last_name.ilike(like, escape="\\"),
+                Contact.email.ilike(like, escape="\\"),
             )
         )
     )
+
+    if db.get_bind().dialect.name == "postgresql":
+        rank = func.greatest(
+            func.word_similarity(query, Contact.first_name),
+            func.word_similarity(query, Contact.last_name),
+            func.word_similarity(query, Contact.email),
+        )
+        stmt = stmt.order_by(rank.desc(), Contact.last_name, Contact.first_name)
+    else:
+        stmt = stmt.order_by(Contact.last_name, Contact.first_name)
+
+    result = await db.execute(stmt.limit(limit))
     return result.scalars().all()
 
 
+def _birthday_window(today: date, days: int):
+    """
+
+    Умова вибірки контактів, чиї дні народження потрапляють у
+    проміжок ``[today, today + days]``, та ключ сортування за найближчою датою.
+
+    Вікно, що переходить через кінець року, розбивається на два діапазони.
+    У невисокосні роки 29 лютого відзначається 28 лютого.
+
+    :param today: Початок вікна
+    :param days: Кількість днів у вікні
+    :return: Умова ``where`` та вираз для ``order_by``
+
+    """
+
+    start_key = birthday_key(today)
+    order = (case((Contact.birthday_md >= start_key, 0), else_=1), Contact.birthday_md)
+
+    if days >= 365:
+        return Contact.birthday_md.isnot(None), order
+
+    end = today + timedelta(days=days)
+    end_key = birthday_key(end)
+
+    if end.year == today.year:
+        condition = Contact.birthday_md.between(start_key, end_key)
+    else:
+        condition = or_(
+            Contact.birthday_md >= start_key, Contact.birthday_md <= end_key
+        )
+
+    for year in {today.year, end.year}:
+        if not isleap(year) and today <= date(year, 2, 28) <= end:
+            condition = or_(condition, Contact.birthday_md == FEB_29_KEY)
+
+    return condition, order
+
+
 async def upcoming_birthdays(
     db: AsyncSession, user_id: int, days: int = 7
 ) -> List[Contact]:
     """ 
     
     Отримання списку контактів з найближчими днями народження.
+
+    Вікно фільтрується в SQL по індексу (owner_id, birthday_md),
+    тому запит читає лише контакти з відповідними датами.
     
     :param db: AsyncSession SQLAlchemy
     :param user_id: Ідентифікатор користувача
     :param days: Кількість днів для пошуку найближчих днів народження
     
     """
-    # Вибірка всіх контактів
-    result = await db.execute(select(Contact).where(Contact.owner_id == user_id))
-    contacts = result.scalars().all()
 
-    today = date.today()
-    next_week = today + timedelta(days=days)
+    condition, order = _birthday_window(date.today(), days)
+    result = await db.execute(
+        select(Contact)
+        .where(Contact.owner_id == user_id)
+        .where(condition)
+        .order_by(*order, Contact.last_name, Contact.first_name)
+    )
+    return result.scalars().all()
+
+
+async def upcoming_birthdays_by_owner(
+    db: AsyncSession, start_id: int, end_id: int, today: date, days: int = 7
+) -> List[Tuple[int, str, Optional[Contact]]]:
+    """
+
+    Найближчі дні народження всіх активних користувачів з діапазону ID
+    одним запитом (users LEFT JOIN contacts з умовою вікна в ON).
+
+    :param db: AsyncSession SQLAlchemy
+    :param start_id: Початок діапазону ID користувачів (включно)
+    :param end_id: Кінець діапазону ID користувачів (не включно)
+    :param today: Початок вікна
+    :param days: Кількість днів у вікні
+    :return: Рядки (id користувача, email, контакт або None) по порядку
+
+    """
+
+    condition, order = _birthday_window(today, days)
+    result = await db.execute(
+        select(User.id, User.email, Contact)
+        .outerjoin(Contact, (Contact.owner_id == User.id) & condition)
+        .where(User.id >= start_id, User.id < end_id, User.is_active.is_(True))
+        .order_by(User.id, *order, Contact.last_name, Contact.first_name)
+    )
+    return result.all()
+
+
+async def get_user_id_range(db: AsyncSession) -> Tuple[Optional[int], Optional[int]]:
+    """
 
-    # Фільтруємо на Python
-    upcoming = []
+    Найменший і найбільший ID користувачів (для поділу на шарди).
 
-    for contact in contacts:
-        if not contact.date_of_birth:
-            continue
+    :param db: AsyncSession SQLAlchemy
 
-        # День народження цього року
-        bday_this_year = contact.date_of_birth.replace(year=today.year)
+    """
 
-        # Якщо вже минув, то наступного року
-        if bday_this_year < today:
-            bday_this_year = bday_this_year.replace(year=today.year + 1)
+    result = await db.execute(select(func.min(User.id), func.max(User.id)))
+    return tuple(result.one())
 
-        # Інтервал між сьогодні і через 7 днів
-        if today <= bday_this_year <= next_week:
-            upcoming.append((bday_this_year, contact))
 
-    # Сортуання за найближчою датою народження
-    upcoming.sort(key=lambda x: x[0])
+async def get_user_ids_in_range(db: AsyncSession, start_id: int, end_id: int) -> List[int]:
+    """
 
-    # Повертання тільки контакти (без дати)
-    return [contact for _, contact in upcoming]
+    ID користувачів шарда ``[start_id, end_id)``.
+
+    :param db: AsyncSession SQLAlchemy
+    :param start_id: Перший ID шарда
+    :param end_id: ID після останнього в шарді
+
+    """
+
+    result = await db.execute(
+        select(User.id).where(User.id >= start_id, User.id < end_id).order_by(User.id)
+    )
+    return result.scalars().all()
 
 
 async def get_user_by_id(db: AsyncSession, user_id: int):
@@ -231,6 +749,7 @@ async def update_avatar(db: AsyncSession, current_user, avatar_url: str):
     )
     await db.execute(stmt)
     await db.commit()
+    await delete_user_cache(current_user.id)
 
 
 async def list_users(db: AsyncSession, q: str | None = None):
@@ -252,6 +771,29 @@ async def list_users(db: AsyncSession, q: str | None = None):
     return result.scalars().all()
 
 
+async def stream_users(
+    db: AsyncSession, q: str | None = None, batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[User]:
+    """
+
+    Потокове читання користувачів (server-side курсор) для великих таблиць.
+
+    :param db: AsyncSession SQLAlchemy
+    :param q: Пошук за email або full_name (необов'язково)
+    :param batch_size: Кількість рядків, що вибираються з БД за раз
+    :return: Асинхронний ітератор користувачів
+
+    """
+    stmt = select(User).order_by(User.id).execution_options(yield_per=batch_size)
+    if q:
+        q_like = f"%{q}%"
+        stmt = stmt.where((User.email.ilike(q_like)) | (User.full_name.ilike(q_like)))
+
+    result = await db.stream_scalars(stmt)
+    async for user in result:
+        yield user
+
+
 async def update_user_role_and_status(
     db: AsyncSession,
     user: User,
@@ -275,12 +817,39 @@ async def update_user_role_and_status(
         user.is_active = is_active
     if is_verified is not None:
         user.is_verified = is_verified
+    # Роль і статус є в claims токенів — видані раніше токени відкликаємо
+    user.token_version = User.token_version + 1
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    await delete_user_cache(user.id)
+    await set_token_version(user.id, user.token_version)
     return user
 
 
+async def revoke_user_tokens(db: AsyncSession, user_id: int) -> Optional[int]:
+    """
+
+    Відкликання всіх виданих токенів користувача (збільшення token_version).
+
+    :param db: AsyncSession SQLAlchemy
+    :param user_id: Ідентифікатор користувача
+    :return: Нова версія або None, якщо користувача немає
+
+    """
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .returning(User.token_version)
+    )
+    version = result.scalar_one_or_none()
+    await db.commit()
+    if version is not None:
+        await set_token_version(user_id, version)
+    return version
+
+
 async def delete_user(db: AsyncSession, user: User):
     """ 
     
@@ -290,8 +859,11 @@ async def delete_user(db: AsyncSession, user: User):
     :param user: Екземпляр користувача для видалення
     
     """
+    user_id = user.id
     await db.delete(user)
     await db.commit()
+    await delete_user_cache(user_id)
+    await set_token_version(user_id, None)
     return True
 
 
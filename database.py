@@ -1,5 +1,5 @@
 # from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-# from sqlalchemy.orm import sessionmaker, declarative_base
+# from sqlalchemy.orm import sessionmaker, declarative_base, Session
 # from config import get_settings
 
 # engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True)
@@ -11,13 +11,89 @@
 #     async with AsyncSessionLocal() as session:
 #         yield session
 
+from fastapi import Depends, Request
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import get_settings
+import itertools
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 _engine = None
 _AsyncSessionLocal = None
+_replica_sessions = None
+_replica_cycle = None
+
+# Cookie, що закріплює читання користувача за primary після його змін
+PRIMARY_PIN_COOKIE = "db_primary_until"
+
+# Статистика видачі з'єднань з пулу
+_pool_stats = {
+    "waiting": 0,
+    "checkouts": 0,
+    "checkout_time_total": 0.0,
+    "checkout_time_max": 0.0,
+    "slow_checkouts": 0,
+    "timeouts": 0,
+}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """ Пул з'єднань, що вимірює час очікування з'єднання та довжину черги """
+
+    def _do_get(self):
+        _pool_stats["waiting"] += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            _pool_stats["timeouts"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            _pool_stats["waiting"] -= 1
+            _pool_stats["checkouts"] += 1
+            _pool_stats["checkout_time_total"] += elapsed
+            _pool_stats["checkout_time_max"] = max(
+                _pool_stats["checkout_time_max"], elapsed
+            )
+            slow_ms = get_settings().DB_SLOW_CHECKOUT_MS
+            if elapsed * 1000 >= slow_ms:
+                _pool_stats["slow_checkouts"] += 1
+                logger.warning(
+                    "Slow DB connection checkout: %.1f ms (%s)",
+                    elapsed * 1000,
+                    self.status(),
+                )
+
+
+def _engine_options(settings, database_url: str) -> dict:
+    """ Параметри пулу та драйвера з Settings """
+    url = make_url(database_url)
+    options = {"echo": False, "future": True}
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        }
+    return options
+
 
 def get_engine():
     """ Асинхроний двіжок БД """
@@ -25,10 +101,82 @@ def get_engine():
     if _engine is None:
         settings = get_settings()
         _engine = create_async_engine(
-            settings.DATABASE_URL, echo=False, future=True
+            settings.DATABASE_URL,
+            **_engine_options(settings, settings.DATABASE_URL),
         )
     return _engine
 
+
+def get_migration_heads() -> set[str]:
+    """ Head-ревізії Alembic з каталогу міграцій (без підключення до БД) """
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    config = Config(os.path.join(root, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(root, "alembic"))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+async def check_schema_revision(engine=None):
+    """
+
+    Перевірка під час старту, що схема БД відповідає міграціям коду.
+
+    Один SELECT з ``alembic_version`` замість ``metadata.create_all``;
+    схема без міграцій або з іншою ревізією — RuntimeError (спочатку
+    ``alembic upgrade head``). Недоступна БД лише логується: застосунок
+    стартує, а з'єднання відновиться пізніше.
+
+    :param engine: Двіжок БД (за замовчуванням — двіжок застосунку)
+
+    """
+    heads = get_migration_heads()
+    try:
+        conn = await (engine or get_engine()).connect()
+    except (OSError, DBAPIError) as e:
+        logger.warning("Schema revision check skipped, database unavailable: %s", e)
+        return
+    try:
+        has_table = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).has_table("alembic_version")
+        )
+        if not has_table:
+            raise RuntimeError("Database is not migrated: run 'alembic upgrade head'")
+        result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        current = set(result.scalars())
+    finally:
+        await conn.close()
+    if current != heads:
+        raise RuntimeError(
+            f"Database revision {sorted(current)} does not match migrations "
+            f"{sorted(heads)}: run 'alembic upgrade head'"
+        )
+
+
+def get_pool_stats() -> dict:
+    """ Метрики пулу з'єднань: зайняті/вільні з'єднання, черга, час видачі """
+    pool = get_engine().sync_engine.pool
+    checkouts = _pool_stats["checkouts"]
+    stats = {
+        "waiting": _pool_stats["waiting"],
+        "checkouts": checkouts,
+        "avg_checkout_ms": (
+            _pool_stats["checkout_time_total"] / checkouts * 1000 if checkouts else 0.0
+        ),
+        "max_checkout_ms": _pool_stats["checkout_time_max"] * 1000,
+        "slow_checkouts": _pool_stats["slow_checkouts"],
+        "timeouts": _pool_stats["timeouts"],
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            size=pool.size(),
+            in_use=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return stats
+
 def get_session():
     """ Sessionmaker для асинхроних сесій """
     global _AsyncSessionLocal
@@ -38,8 +186,66 @@ def get_session():
         )
     return _AsyncSessionLocal
 
-async def get_db():
+def get_replica_sessions() -> list:
+    """ Sessionmaker-и для реплік з DATABASE_REPLICA_URLS (порожньо — реплік немає) """
+    global _replica_sessions, _replica_cycle
+    if _replica_sessions is None:
+        settings = get_settings()
+        urls = [u.strip() for u in settings.DATABASE_REPLICA_URLS.split(",") if u.strip()]
+        _replica_sessions = [
+            sessionmaker(
+                create_async_engine(url, **_engine_options(settings, url)),
+                class_=AsyncSession,
+                expire_on_commit=False,
+            )
+            for url in urls
+        ]
+        _replica_cycle = itertools.cycle(_replica_sessions)
+    return _replica_sessions
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    """ Чи змінював користувач дані протягом READ_YOUR_WRITES_SECONDS """
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_request_write(session):
+    # Запит, що закомітив зміни, отримає cookie закріплення за primary
+    state = session.info.get("request_state")
+    if state is not None:
+        state.db_wrote = True
+
+
+def get_read_sessionmaker(request: Request):
+    """ Sessionmaker для читання поза залежностями (напр. у потоковій відповіді) """
+    if not get_replica_sessions() or is_pinned_to_primary(request):
+        return get_session()
+    return next(_replica_cycle)
+
+
+async def get_db(request: Request):
     """ Асинхрона для отримання сессії """
     AsyncSessionLocal = get_session()
     async with AsyncSessionLocal() as session:
+        session.info["request_state"] = request.state
+        yield session
+
+
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+
+    Сесія для запитів лише на читання.
+
+    Віддає сесію репліки (по колу), якщо репліки налаштовані і користувач
+    не змінював дані останні READ_YOUR_WRITES_SECONDS; інакше — primary.
+
+    """
+    if not get_replica_sessions() or is_pinned_to_primary(request):
+        yield db
+        return
+    async with next(_replica_cycle)() as session:
         yield session
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import (
     FastAPI,
     Request,
@@ -9,25 +10,33 @@ from fastapi import (
     HTTPException,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import RedirectResponse, JSONResponse, HTMLResponse, FileResponse
+from fastapi.responses import (
+    RedirectResponse,
+    JSONResponse,
+    HTMLResponse,
+    FileResponse,
+    Response,
+)
 from fastapi.staticfiles import StaticFiles
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from jose import JWTError, jwt
-from database import get_db, get_engine
+from database import check_schema_revision, get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from config import get_settings
 from routers.contacts import router as contacts_router
 from routers.admin import router as admin_router
+from routers.api import router as api_router
 from routers.users import get_current_user, get_user_by_id, router as user_router
 from services.auth import (
-    verify_password,
+    verify_password_async,
     create_access_token,
     create_temp_token,
     create_refresh_token,
-    get_password_hash,
+    get_password_hash_async,
+    decode_access_token_cached,
+    user_token_claims,
 )
 from services.email import (
     get_user_by_email,
@@ -35,20 +44,43 @@ from services.email import (
     create_email_confirmation_token,
     router as email_router,
 )
-from cache.user_cache import cache_user
+from cache.user_cache import cache_user, get_or_load_user
+from services.scheduler import start_scheduler, stop_scheduler
+from services.avatars import shutdown_executor
 from middleware.auth import AuthMiddleware
 from middleware.rate_limit import limiter
+from middleware.read_your_writes import ReadYourWritesMiddleware
+from middleware.metrics import MetricsMiddleware
+from services.metrics import render_metrics
+from templating import templates, precompile_templates
 import models, crud, schemas
+import secrets
+
 
-settings=get_settings()
-engine = get_engine()
+# перевірка ревізії схеми (SCHEMA_CHECK); компіляція шаблонів до першого
+# запиту; щоденне обчислення днів народження у процесі застосунку (SCHEDULER_ENABLED)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # налаштування (.env) читаються тут один раз, а не під час імпорту
+    settings = get_settings()
+    if settings.SCHEMA_CHECK:
+        await check_schema_revision()
+    precompile_templates()
+    start_scheduler()
+    yield
+    # дочекатися відправки листів з черги перед зупинкою
+    from services.mailer import stop_mailer
+
+    await stop_scheduler()
+    await stop_mailer()
+    shutdown_executor()
 
-templates = Jinja2Templates(directory="templates")
 
 app = FastAPI(
     title="Contacts API",
     description="API for managing contacts with user authentication.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS
@@ -62,27 +94,25 @@ app.add_middleware(
 
 # 🔐 AUTH MIDDLEWARE
 app.add_middleware(AuthMiddleware)
+# читання з primary одразу після змін (коли налаштовані репліки)
+app.add_middleware(ReadYourWritesMiddleware)
 # підключаємо middleware та limiter
 app.state.limiter = limiter
 app.add_middleware(SlowAPIMiddleware)
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# 📊 метрики — зовнішній middleware, щоб враховувати весь запит
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(contacts_router)
 app.include_router(user_router)
 app.include_router(email_router)
 app.include_router(admin_router)
+app.include_router(api_router)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
-# створити таблиці при старті (замість повноцінних міграцій)
-@app.on_event("startup")
-async def on_startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(models.Base.metadata.create_all)
-
-
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Головна сторінка - перевірка аутентифікації користувача."""
@@ -91,11 +121,7 @@ async def home(request: Request):
 
     if token:
         try:
-            payload = jwt.decode(
-                token,
-                settings.SECRET_KEY,
-                algorithms=[settings.ALGORITHM],
-            )
+            payload = decode_access_token_cached(token)
             user_id = int(payload.get("sub"))
 
             return RedirectResponse("/contacts", status_code=303)
@@ -133,8 +159,9 @@ async def register_submit(
                 status_code=409,
             )
 
-        hashed = get_password_hash(password)
+        hashed = await get_password_hash_async(password)
         
+        settings = get_settings()
         if email == settings.SECRET_ADMIN_EMAIL and password == settings.SECRET_ADMIN :
             role = "admin"
         else:
@@ -156,6 +183,9 @@ async def register_submit(
 
         return RedirectResponse("/login?success=1", status_code=303)
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()
         return templates.TemplateResponse(
@@ -172,9 +202,7 @@ async def login_form(request: Request):
     token = request.cookies.get("access_token")
     if token:
         try:
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-            )
+            payload = decode_access_token_cached(token)
             if payload.get("type") == "access":
                 user_id = int(payload.get("sub"))
                 if user_id:
@@ -195,7 +223,7 @@ async def login_submit(
 
     user = await get_user_by_email(db, email)
 
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password_async(password, user.hashed_password):
         return templates.TemplateResponse(
             "login.html",
             {"request": request, "error": "Invalid credentials"},
@@ -212,13 +240,15 @@ async def login_submit(
             httponly=True,
             secure=True,
             samesite="None",
-            max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            max_age=get_settings().ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         )
         return resp
 
     # Створення JWT токів обов'язково після успішної аутентифікації
-    token = create_access_token(subject=user.id, role=user.role)
-    refresh_token = create_refresh_token(subject=user.id)
+    token = create_access_token(subject=user.id, **user_token_claims(user))
+    refresh_token = create_refresh_token(
+        subject=user.id, token_version=user.token_version
+    )
 
     # ⚡ Кешируемо користувача в Redis
     await cache_user(user)
@@ -229,7 +259,7 @@ async def login_submit(
         value=token,
         httponly=True,
         secure=True,
-        max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        max_age=get_settings().ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         samesite="None",
         path="/",
     )
@@ -239,7 +269,7 @@ async def login_submit(
         value=refresh_token,
         httponly=True,
         secure=True,
-        max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        max_age=get_settings().ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         samesite="None",
         path="/",
     )
@@ -281,9 +311,16 @@ async def logout():
 
 
 @app.get("/profile")
-async def profile(request: Request, current_user=Depends(get_current_user)):
+async def profile(
+    request: Request,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """Профіль користувача."""
 
+    # Профіль не входить у claims токена — кеш Redis, інакше БД
+    current_user = await get_or_load_user(db, current_user.id)
+
     return templates.TemplateResponse(
         "profile.html", {"request": request, "user": current_user}
     )
@@ -298,10 +335,10 @@ async def login_token(
     """Обробка логіну користувача для SPA - повертає JWT токен."""
 
     user = await get_user_by_email(db, email)
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password_async(password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = create_access_token(subject=user.id)
+    token = create_access_token(subject=user.id, **user_token_claims(user))
 
     response = JSONResponse({"access_token": token})
     response.set_cookie(
@@ -330,6 +367,27 @@ async def rate_limit_handler(request, exc):
     return JSONResponse(status_code=429, content={"error": "Too many requests"})
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Метрики у форматі Prometheus (лише з ``Authorization: Bearer METRICS_TOKEN``)."""
+
+    # 🔒 cookie-сесії тут немає (scrape Prometheus), тому окремий токен
+    expected = get_settings().METRICS_TOKEN
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        credentials.encode(), expected.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
 @app.get("/favicon.ico")
 async def favicon():
     return FileResponse("static/favicon.ico")
@@ -1,101 +1,208 @@
-from fastapi import FastAPI, Request, Form, Depends, Query, HTTPException
-from fastapi.responses import RedirectResponse, JSONResponse, HTMLResponse
-from jose import JWTError, jwt
+import re
+from urllib.parse import urlencode
+from fastapi.responses import RedirectResponse, Response
+from jose import jwt
+from starlette.requests import cookie_parser
 from config import get_settings
-from starlette.middleware.base import BaseHTTPMiddleware
-from services.auth import create_access_token
-from routers.users import get_user_by_id
+from cache.token_version import get_token_version
+from cache.user_cache import get_or_load_user
 from database import get_session
+from services.auth import (
+    create_access_token,
+    decode_access_token_cached,
+    user_token_claims,
+)
+from services.deps import token_is_current
 
-settings=get_settings()
-
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # path = request.url.path
-        path = request.url.path.rstrip("/")
-
-        # Маршрути без захисту
-        public_paths = [
-            "/",
-            "/login",
-            "/register",
-            "/static",
-            "/favicon.ico",
-            "/auth/token",
-            "/auth/confirm-email",
-            "/users/resend-confirmation",
-            "/users/request-password-reset",
-            "/verify-info",
-            "/resend-confirmation",
-            "/docs",
-            "/openapi.json",
-        ]
-
-        if any(path == pub or path.startswith(pub + "/") for pub in public_paths):
-            return await call_next(request)
+# Маршрути без захисту (сам шлях і все під ним)
+PUBLIC_PATHS = (
+    "/login",
+    "/register",
+    "/static",
+    "/favicon.ico",
+    "/auth/token",
+    "/auth/confirm-email",
+    "/users/resend-confirmation",
+    "/users/request-password-reset",
+    "/verify-info",
+    "/resend-confirmation",
+    "/docs",
+    "/openapi.json",
+    "/metrics",  # власна перевірка METRICS_TOKEN
+)
+
+
+def compile_public_paths(paths=PUBLIC_PATHS) -> re.Pattern:
+    """
+    Один регулярний вираз для всіх публічних маршрутів.
+
+    Головна сторінка — лише точний збіг; JSON API (``/api/``) пропускається,
+    бо Bearer-токен перевіряють залежності (401 замість редиректу).
+
+    """
+    prefixes = "|".join(re.escape(p) for p in sorted(paths, key=len, reverse=True))
+    return re.compile(rf"/$|/api/|(?:{prefixes})(?:/|$)")
+
+
+def _access_cookie_header(token: str) -> tuple[bytes, bytes]:
+    response = Response()
+    response.set_cookie(
+        "access_token",
+        token,
+        httponly=True,
+        secure=True,
+        samesite="None",
+        path="/",
+    )
+    return next(h for h in response.raw_headers if h[0] == b"set-cookie")
+
+
+def _cookie_header(cookies: dict) -> bytes:
+    return "; ".join(f"{name}={value}" for name, value in cookies.items()).encode(
+        "latin-1"
+    )
+
+
+async def _access_token_is_current(payload: dict) -> bool:
+    """Чи не відкликано access-токен (``tv``), як у залежностях маршрутів"""
+    try:
+        async with get_session()() as db:
+            return await token_is_current(db, payload)
+    except (TypeError, ValueError):
+        # sub не є ID користувача
+        return False
+
+
+def _get_cookies(scope) -> dict:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            return cookie_parser(value.decode("latin-1"))
+    return {}
+
+
+class AuthMiddleware:
+    """
+    Перевірка cookie-токенів для HTML-маршрутів (чистий ASGI).
+
+    Публічні шляхи пропускаються одним збігом регулярного виразу, без
+    розбору cookie і без створення Request; відповіді не буферизуються,
+    тож потокові тіла проходять як є.
+
+    """
+
+    def __init__(self, app, public_paths=PUBLIC_PATHS):
+        self.app = app
+        self.public = compile_public_paths(public_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.public.match(scope["path"]):
+            return await self.app(scope, receive, send)
 
         # Отримання токенів з cookie
-        access_token = request.cookies.get("access_token")
-        refresh_token = request.cookies.get("refresh_token")
+        cookies = _get_cookies(scope)
+        access_token = cookies.get("access_token")
+        refresh_token = cookies.get("refresh_token")
 
         # 🔥 Якщо cookie видалени — НЕ авторизуємося!
         if not access_token and not refresh_token:
-            return RedirectResponse("/login", status_code=303)
-
-        user_id = None
-        payload = None
+            return await self._redirect_to_login(scope, receive, send)
 
         # Перевірка access token
         if access_token:
+            token = access_token.replace("Bearer ", "")
             try:
-                payload = jwt.decode(
-                    access_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-                )
-                user_id = payload.get("sub")
-                return await call_next(request)
-            except:
-                access_token = None  # invalid token
+                payload = decode_access_token_cached(token)
+            except Exception:
+                payload = None  # invalid token
+            # Відкликаний токен або токен без tv — далі як прострочений:
+            # оновлення за refresh-токеном або редирект на /login
+            if payload is not None and not await _access_token_is_current(payload):
+                payload = None
+            if payload is not None:
+                # Превірка підтверждення email — за claims, без запиту до БД
+                if payload.get("is_verified") is False:
+                    return await self._redirect_to_verify(payload, scope, receive, send)
+                # Claims (sub, role, type, exp) для залежностей — без повторного decode
+                state = scope.setdefault("state", {})
+                state["access_token"] = token
+                state["token_claims"] = payload
+                return await self.app(scope, receive, send)
 
         # Перевірка refresh token
         if refresh_token:
-            try:
-                payload = jwt.decode(
-                    refresh_token,
-                    settings.REFRESH_SECRET_KEY,
-                    algorithms=[settings.ALGORITHM],
-                )
-                user_id = payload.get("sub")
-                new_access = create_access_token(user_id)
-                response = await call_next(request)
-                response.set_cookie(
-                    "access_token",
-                    new_access,
-                    httponly=True,
-                    secure=True,
-                    samesite="None",
-                    path="/",
-                )
-                return response
-            except Exception:
-                return RedirectResponse("/login", status_code=303)
+            new_access = await self._refresh_access_token(refresh_token)
+            if new_access is None:
+                return await self._redirect_to_login(scope, receive, send)
+
+            # Поточний запит обробляється вже з новим access-токеном
+            cookies["access_token"] = new_access
+            scope["headers"] = [
+                (name, value) for name, value in scope["headers"] if name != b"cookie"
+            ] + [(b"cookie", _cookie_header(cookies))]
+            state = scope.setdefault("state", {})
+            state["access_token"] = new_access
+            state["token_claims"] = decode_access_token_cached(new_access)
+
+            cookie = _access_cookie_header(new_access)
 
-        if not user_id:
-            return RedirectResponse("/login", status_code=303)
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append(cookie)
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            return await self.app(scope, receive, send_wrapper)
+
+        return await self._redirect_to_login(scope, receive, send)
+
+    @staticmethod
+    async def _refresh_access_token(refresh_token: str) -> str | None:
+        """
+        Новий access-токен за refresh-токеном (None — сесію відкликано).
+
+        Claims беруться з кешу користувачів; refresh-токен з ``tv`` дійсний,
+        лише поки версія токенів користувача не змінилась.
+
+        """
+        settings = get_settings()
+        try:
+            payload = jwt.decode(
+                refresh_token,
+                settings.REFRESH_SECRET_KEY,
+                algorithms=[settings.ALGORITHM],
+            )
+            user_id = int(payload.get("sub"))
+        except Exception:
+            return None
 
-        # Отримання користувача з БД
         async with get_session()() as db:
-            user = await get_user_by_id(db,user_id)
-            if not user:
-                return RedirectResponse("/login", status_code=303)
-
-            # Превірка підтверждення email
-            if (
-                not user.is_verified
-                and not path.startswith("/verify-info")
-                and not path.startswith("/users/resend-confirmation")
-            ):
-                # return RedirectResponse("/verify-info", status_code=303)
-                return RedirectResponse(f"/verify-info?email={user.email}", status_code=303)
-
-            return await call_next(request)
-        # return RedirectResponse("/login", status_code=303)
+            user = await get_or_load_user(db, user_id)
+            version = await get_token_version(db, user_id) if user else None
+        if user is None or version is None or not user.is_active:
+            return None
+        # Refresh-токен без tv неможливо відкликати — не приймається
+        if payload.get("tv") != version:
+            return None
+        user.token_version = version
+        return create_access_token(user.id, **user_token_claims(user))
+
+    @classmethod
+    async def _redirect_to_verify(cls, payload, scope, receive, send):
+        # Email для сторінки підтвердження; рідкісний шлях, тож кеш/БД тут прийнятні
+        user = None
+        if str(payload.get("sub", "")).isdigit():
+            async with get_session()() as db:
+                user = await get_or_load_user(db, int(payload["sub"]))
+        url = "/verify-info"
+        if user is not None:
+            url += "?" + urlencode({"email": user.email})
+        await cls._redirect(scope, receive, send, url)
+
+    @staticmethod
+    async def _redirect(scope, receive, send, url: str):
+        await RedirectResponse(url, status_code=303)(scope, receive, send)
+
+    @classmethod
+    async def _redirect_to_login(cls, scope, receive, send):
+        await cls._redirect(scope, receive, send, "/login")
@@ -0,0 +1,55 @@
+import time
+from services.metrics import (
+    HTTP_IN_FLIGHT,
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    UNMATCHED_ROUTE,
+    finish_request_db_tracking,
+    start_request_db_tracking,
+)
+
+
+def _route_label(scope, root_path: str) -> str:
+    """ Шаблон маршруту FastAPI або префікс змонтованого застосунку (/static) """
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", UNMATCHED_ROUTE)
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        return mounted[len(root_path):]
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ ASGI middleware: кількість, тривалість, запити в роботі та запити до БД """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        db_token = start_request_db_tracking()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            route = _route_label(scope, root_path)
+            finish_request_db_tracking(db_token, route)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
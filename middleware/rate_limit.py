@@ -1,7 +1,221 @@
+import time
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request
+from limits.storage import RedisStorage, Storage, storage_from_string
+from limits.storage.base import SlidingWindowCounterSupport
+from config import get_settings
+
+
+# Як acquire_sliding_window.lua з ``limits``, але спершу безумовно записує
+# вже пропущені локально хіти (ARGV[4]) і повертає залишок ліміту після
+# поточного запиту, або -1, якщо запит відхилено
+FLUSH_AND_ACQUIRE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local expiry = tonumber(ARGV[2]) * 1000
+local amount = tonumber(ARGV[3])
+local pending = tonumber(ARGV[4])
+
+local current_ttl = tonumber(redis.call('pttl', KEYS[2]))
+if current_ttl > 0 and current_ttl < expiry then
+    redis.call('rename', KEYS[2], KEYS[1])
+    redis.call('set', KEYS[2], 0, 'PX', current_ttl + expiry)
+end
+
+local function add(value)
+    if redis.call('exists', KEYS[2]) == 1 then
+        redis.call('incrby', KEYS[2], value)
+    else
+        redis.call('set', KEYS[2], value, 'PX', expiry * 2)
+    end
+end
+
+if pending > 0 then
+    add(pending)
+end
+
+local previous_count = tonumber(redis.call('get', KEYS[1])) or 0
+local previous_ttl = tonumber(redis.call('pttl', KEYS[1])) or 0
+local current_count = tonumber(redis.call('get', KEYS[2])) or 0
+if previous_ttl <= 0 then
+    previous_ttl = 0
+end
+local weighted_count = math.floor(previous_count * previous_ttl / expiry) + current_count
+
+if amount > limit or (weighted_count + amount) > limit then
+    return -1
+end
+add(amount)
+return limit - weighted_count - amount
+"""
+
+
+class LocalBudgetRedisStorage(RedisStorage):
+    """
+    Redis-сховище лімітів зі спільним для всіх воркерів ковзним вікном
+    (атомарний Lua-скрипт, один round-trip на перевірку).
+
+    Кожен воркер має локальний бюджет до ``limit * RATE_LIMIT_LOCAL_RATIO``
+    на ключ, але лише в межах запасу, який показала остання відповідь
+    Redis для цього ключа: клієнт, що вже перевищив ліміт, бюджету не
+    отримує. Пропущені локально хіти безумовно дописуються в Redis разом
+    із наступною перевіркою. Перевищення між воркерами обмежене
+    ``воркери * бюджет``.
+
+    URI: ``budget+redis://host:6379/0`` (або ``budget+rediss://``).
+
+    """
+
+    STORAGE_SCHEME = ["budget+redis", "budget+rediss"]
+
+    # Після стількох ключів прострочені записи прибираються з локального стану
+    MAX_LOCAL_KEYS = 10_000
+
+    def __init__(self, uri: str, **options):
+        super().__init__(uri.replace("budget+", "", 1), **options)
+        self.local_ratio = get_settings().RATE_LIMIT_LOCAL_RATIO
+        # key -> [хіти, ще не записані в Redis, залишок бюджету, дійсний до]
+        self._local: dict[str, list] = {}
+
+    def initialize_storage(self, _uri: str) -> None:
+        super().initialize_storage(_uri)
+        self.lua_flush_and_acquire = self.get_connection().register_script(
+            FLUSH_AND_ACQUIRE_SCRIPT
+        )
+
+    @staticmethod
+    def _window_keys(key: str) -> tuple[str, str]:
+        """
+        Ключі попереднього і поточного вікна, як у RedisStorage з ``limits``
+        (get_sliding_window читає ті самі ключі). Фігурні дужки тримають
+        обидва ключі на одному вузлі Redis Cluster.
+
+        """
+        return f"{{{key}}}/-1", f"{{{key}}}"
+
+    def _flush_and_acquire(
+        self, key: str, limit: int, expiry: int, amount: int, pending: int
+    ) -> int:
+        previous_key, current_key = map(self.prefixed_key, self._window_keys(key))
+        return int(
+            self.lua_flush_and_acquire(
+                [previous_key, current_key], [limit, expiry, amount, pending]
+            )
+        )
+
+    def acquire_sliding_window_entry(
+        self, key: str, limit: int, expiry: int, amount: int = 1
+    ) -> bool:
+        budget = int(limit * self.local_ratio)
+        if budget <= 0:
+            return super().acquire_sliding_window_entry(key, limit, expiry, amount)
+
+        now = time.monotonic()
+        entry = self._local.get(key)
+        if entry is not None and entry[2] > now and entry[1] >= amount:
+            entry[0] += amount
+            entry[1] -= amount
+            return True
+
+        # Відкладені хіти записуються безумовно, поточний — лише в межах ліміту
+        pending = entry[0] if entry is not None else 0
+        remaining = self._flush_and_acquire(key, limit, expiry, amount, pending)
+        if entry is None and len(self._local) >= self.MAX_LOCAL_KEYS:
+            self._local = {k: v for k, v in self._local.items() if v[2] > now}
+        # Бюджет не більший за запас ліміту в Redis; після відмови — нульовий
+        self._local[key] = [0, min(budget, max(remaining, 0)), now + expiry]
+        return remaining >= 0
+
+
+def client_ip(request: Request) -> str:
+    """
+    IP клієнта з урахуванням X-Forwarded-For від довірених проксі.
+
+    Довіряємо лише останнім TRUSTED_PROXY_HOPS адресам заголовка, які
+    дописали наші проксі; значення від самого клієнта ігнорується.
+
+    """
+    hops = get_settings().TRUSTED_PROXY_HOPS
+    if hops:
+        forwarded = request.headers.get("x-forwarded-for", "")
+        chain = [ip.strip() for ip in forwarded.split(",") if ip.strip()]
+        if len(chain) >= hops:
+            return chain[-hops]
+    return get_remote_address(request)
+
+
+def user_or_ip_key(request: Request) -> str:
+    """Ключ ліміту для автентифікованих маршрутів: користувач, інакше IP"""
+    claims = getattr(request.state, "token_claims", None)
+    if claims and claims.get("sub"):
+        return f"user:{claims['sub']}"
+    return f"ip:{client_ip(request)}"
+
+
+class SettingsStorage(Storage, SlidingWindowCounterSupport):
+    """
+    Сховище лімітів за RATE_LIMIT_STORAGE_URI, створене при першій
+    перевірці ліміту: імпорт модуля не читає налаштувань.
+
+    URI: ``settings://``.
+
+    """
+
+    STORAGE_SCHEME = ["settings"]
+
+    def __init__(self, uri: str = "settings://", **options):
+        super().__init__(uri)
+        self._options = options
+        self._storage = None
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            self._storage = storage_from_string(
+                get_settings().RATE_LIMIT_STORAGE_URI or "memory://", **self._options
+            )
+        return self._storage
+
+    @property
+    def base_exceptions(self):
+        return self.storage.base_exceptions
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self.storage.incr(key, expiry, amount)
+
+    def get(self, key: str) -> int:
+        return self.storage.get(key)
+
+    def get_expiry(self, key: str) -> float:
+        return self.storage.get_expiry(key)
+
+    def check(self) -> bool:
+        return self.storage.check()
+
+    def reset(self):
+        return self.storage.reset()
+
+    def clear(self, key: str) -> None:
+        return self.storage.clear(key)
+
+    def acquire_sliding_window_entry(
+        self, key: str, limit: int, expiry: int, amount: int = 1
+    ) -> bool:
+        return self.storage.acquire_sliding_window_entry(key, limit, expiry, amount)
+
+    def get_sliding_window(self, key: str, expiry: int):
+        return self.storage.get_sliding_window(key, expiry)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        return self.storage.clear_sliding_window(key, expiry)
+
 
 # limiter = Limiter(key_func=get_remote_address)
-limiter = Limiter(key_func=lambda request: request.client.host)
+limiter = Limiter(
+    key_func=client_ip,
+    strategy="sliding-window-counter",
+    storage_uri="settings://",
+    # Якщо Redis недоступний — тимчасово рахуємо в пам'яті воркера
+    in_memory_fallback_enabled=True,
+)
@@ -0,0 +1,38 @@
+import time
+from config import get_settings
+from database import PRIMARY_PIN_COOKIE
+
+
+class ReadYourWritesMiddleware:
+    """
+    Після запиту, що закомітив зміни в БД, ставить cookie, яка на
+    READ_YOUR_WRITES_SECONDS спрямовує читання користувача на primary,
+    щоб він одразу бачив свої зміни, навіть якщо репліка відстає.
+
+    """
+
+    def __init__(self, app):
+        self.app = app
+        settings = get_settings()
+        self.enabled = bool(settings.DATABASE_REPLICA_URLS.strip())
+        self.seconds = settings.READ_YOUR_WRITES_SECONDS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            return await self.app(scope, receive, send)
+
+        state = scope.setdefault("state", {})
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and state.get("db_wrote"):
+                until = int(time.time() + self.seconds)
+                cookie = (
+                    f"{PRIMARY_PIN_COOKIE}={until}; Max-Age={self.seconds}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
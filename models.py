@@ -8,13 +8,30 @@ from sqlalchemy import (
     ForeignKey,
     DateTime,
     Enum,
+    Index,
+    DDL,
+    event,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from database import Base
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum as PyEnum
 
 
+def birthday_key(value: date | None) -> int | None:
+    """
+    Ключ дня народження ``місяць * 100 + день`` (наприклад, 29 лютого — 229).
+
+    Не залежить від року, тому вікно днів народження фільтрується
+    звичайним порівнянням цілих чисел по індексу.
+
+    """
+
+    if value is None:
+        return None
+    return value.month * 100 + value.day
+
+
 class Contact(Base):
     """
     Модель контакту.
@@ -26,6 +43,7 @@ class Contact(Base):
     :ivar phone: Номер телефону.
     :ivar date_of_birth: Дата народження контакту.
     :ivar information: Додаткова інформація про контакт.
+    :ivar birthday_md: Ключ дня народження (місяць * 100 + день).
     :ivar owner_id: Ідентифікатор власника контакту (користувача).
     :ivar owner: Власник контакту (користувач).
 
@@ -40,12 +58,43 @@ class Contact(Base):
     phone = Column(String(50), nullable=False)
     date_of_birth = Column(Date, nullable=False)
     information = Column(String, nullable=True)
+    birthday_md = Column(Integer, nullable=True)
 
     owner_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     owner = relationship("User", back_populates="contacts")
 
+    # Триграмні GIN-індекси для пошуку ILIKE '%q%' (лише PostgreSQL, pg_trgm)
+    __table_args__ = tuple(
+        Index(
+            f"ix_contacts_{column}_trgm",
+            column,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+        for column in ("first_name", "last_name", "email")
+    ) + (
+        # Вікно найближчих днів народження користувача
+        Index("ix_contacts_owner_birthday_md", "owner_id", "birthday_md"),
+        # Список і keyset-пагінація контактів: WHERE owner_id ORDER BY
+        # (last_name, first_name, id); перша колонка обслуговує і FK owner_id
+        Index("ix_contacts_owner_name", "owner_id", "last_name", "first_name", "id"),
+    )
+
+    @validates("date_of_birth")
+    def _sync_birthday_md(self, key, value):
+        self.birthday_md = birthday_key(value)
+        return value
+
+
+# Розширення pg_trgm потрібне до створення триграмних індексів
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 
 class Role(str, PyEnum):
     """
@@ -75,6 +124,7 @@ class User(Base):
     :ivar avatar_url: URL аватарки користувача.
     :ivar verification_token: Токен для верифікації email користувача.
     :ivar role : Роль користувача (user або admin).
+    :ivar token_version: Версія токенів; збільшення відкликає видані токени.
 
     """
 
@@ -91,6 +141,7 @@ class User(Base):
         String(255), nullable=True
     )  # token for email verification
     role = Column(Enum(Role), default=Role.user)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     contacts = relationship(
         "Contact", back_populates="owner", cascade="all, delete-orphan"
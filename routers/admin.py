@@ -1,27 +1,32 @@
 from fastapi import APIRouter, Request, Depends, Form, status
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
+from templating import templates, stream_template
 from sqlalchemy.ext.asyncio import AsyncSession
 from services.deps import require_role
-from database import get_db
+from database import get_db, get_read_db, get_read_sessionmaker, get_pool_stats
 from models import Role
 import crud, schemas
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/users")
 async def admin_users(
     request: Request,
     q: str | None = None,
-    db: AsyncSession = Depends(get_db),
     admin=Depends(require_role(Role.admin)),
 ):
-    users = await crud.list_users(db, q=q)
-    return templates.TemplateResponse(
-        "admin_users.html", {"request": request, "users": users, "query": q or ""}
+    # Сесія відкривається в генераторі: рядки читаються, поки сторінка стрімиться
+    session_factory = get_read_sessionmaker(request)
+
+    async def users():
+        async with session_factory() as session:
+            async for user in crud.stream_users(session, q=q):
+                yield user
+
+    return stream_template(
+        "admin_users.html", {"request": request, "users": users(), "query": q or ""}
     )
 
 
@@ -29,7 +34,7 @@ async def admin_users(
 async def admin_edit_user_form(
     request: Request,
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     admin=Depends(require_role(Role.admin)),
 ):
     user = await crud.get_user_by_id(db, user_id)
@@ -75,9 +80,15 @@ async def admin_delete_user(
 # Для тестів 
 @router.get("/users/api")
 async def admin_users_api(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     admin=Depends(require_role(Role.admin)),
 ):
     users = await crud.list_users(db)
     return {"users": users}
 
+
+
+# Метрики пулу з'єднань БД
+@router.get("/metrics/db-pool")
+async def admin_db_pool(admin=Depends(require_role(Role.admin))):
+    return get_pool_stats()
@@ -0,0 +1,186 @@
+import zlib
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import contact_cache
+from cache.contacts_version import get_contacts_version
+from database import get_db, get_read_db
+from services.deps import get_dep_current_user
+import crud, models, schemas
+
+router = APIRouter(prefix="/api/v1", tags=["api"])
+
+CONTACT_FIELDS = frozenset(schemas.ContactOut.model_fields)
+
+
+async def get_api_user(
+    user: models.User = Depends(get_dep_current_user),
+) -> models.User:
+    """ Користувач API (Bearer-токен) з підтвердженим email """
+    if not user.is_verified:
+        raise HTTPException(status_code=403, detail="Email not verified")
+    return user
+
+
+def parse_fields(
+    fields: str | None = Query(
+        None, description="Поля відповіді через кому, напр. id,first_name,email"
+    ),
+) -> set[str] | None:
+    """ Вибір полів ContactOut для відповіді (None — усі поля) """
+    if not fields:
+        return None
+    selected = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = selected - CONTACT_FIELDS
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return selected
+
+
+async def contacts_etag(
+    request: Request, user: models.User = Depends(get_api_user)
+) -> str | None:
+    """
+
+    Слабкий ETag відповіді: версія контактів користувача + шлях і параметри.
+
+    Якщо If-None-Match збігається — 304 одразу, до запиту в таблицю контактів.
+
+    """
+    version = await get_contacts_version(user.id)
+    if version is None:
+        return None
+    target = f"{request.url.path}?{request.url.query}".encode()
+    etag = f'W/"{version}-{zlib.crc32(target):08x}"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return etag
+
+
+def dump_contact(
+    contact: models.Contact | schemas.ContactOut, fields: set[str] | None
+) -> dict:
+    return schemas.ContactOut.model_validate(contact).model_dump(
+        mode="json", include=fields
+    )
+
+
+def _json(content, etag: str | None = None, status_code: int = 200) -> JSONResponse:
+    headers = {"ETag": etag} if etag else None
+    return JSONResponse(content, status_code=status_code, headers=headers)
+
+
+@router.get("/contacts", response_model=schemas.ContactPage)
+async def list_contacts(
+    cursor: str | None = Query(None, description="Курсор сторінки"),
+    limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    first_name: str | None = None,
+    last_name: str | None = None,
+    email: str | None = None,
+    fields: set[str] | None = Depends(parse_fields),
+    etag: str | None = Depends(contacts_etag),
+    db: AsyncSession = Depends(get_read_db),
+    user: models.User = Depends(get_api_user),
+):
+    contacts, next_cursor, prev_cursor = await contact_cache.list_contacts_page(
+        db,
+        user_id=user.id,
+        cursor=cursor,
+        limit=limit,
+        first_name=first_name,
+        last_name=last_name,
+        email=email,
+    )
+    return _json(
+        {
+            "contacts": [dump_contact(c, fields) for c in contacts],
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        },
+        etag,
+    )
+
+
+@router.get("/contacts/{contact_id}", response_model=schemas.ContactOut)
+async def get_contact(
+    contact_id: int,
+    fields: set[str] | None = Depends(parse_fields),
+    etag: str | None = Depends(contacts_etag),
+    db: AsyncSession = Depends(get_read_db),
+    user: models.User = Depends(get_api_user),
+):
+    contact = await crud.get_contact(db, contact_id, owner_id=user.id)
+    if not contact:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return _json(dump_contact(contact, fields), etag)
+
+
+@router.post(
+    "/contacts",
+    response_model=schemas.ContactOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_contact(
+    body: schemas.ContactCreate,
+    fields: set[str] | None = Depends(parse_fields),
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_api_user),
+):
+    if body.date_of_birth is None:
+        raise HTTPException(status_code=422, detail="date_of_birth is required")
+    contact = await crud.create_contact(db, body, owner_id=user.id)
+    return _json(dump_contact(contact, fields), status_code=status.HTTP_201_CREATED)
+
+
+@router.patch("/contacts/{contact_id}", response_model=schemas.ContactOut)
+async def update_contact(
+    contact_id: int,
+    body: schemas.ContactUpdate,
+    fields: set[str] | None = Depends(parse_fields),
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_api_user),
+):
+    if "date_of_birth" in body.model_fields_set and body.date_of_birth is None:
+        raise HTTPException(status_code=422, detail="date_of_birth is required")
+    contact = await crud.update_contact(db, contact_id, body, owner_id=user.id)
+    if not contact:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return _json(dump_contact(contact, fields))
+
+
+@router.delete("/contacts/{contact_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_contact(
+    contact_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_api_user),
+):
+    if not await crud.delete_contact(db, contact_id, owner_id=user.id):
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/contacts/bulk-delete")
+async def bulk_delete_contacts(
+    body: schemas.ContactSelection,
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_api_user),
+):
+    deleted = await crud.bulk_delete_contacts(db, user.id, body)
+    return {"deleted": deleted}
+
+
+@router.post("/contacts/bulk-update")
+async def bulk_update_contacts(
+    body: schemas.ContactBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_api_user),
+):
+    updated = await crud.bulk_update_contacts(db, user.id, body, body.values)
+    return {"updated": len(updated), "ids": updated}
@@ -1,18 +1,32 @@
-from fastapi import APIRouter, Query, Depends, HTTPException, status, Request, Form
+from fastapi import (
+    APIRouter,
+    Query,
+    Depends,
+    HTTPException,
+    status,
+    Request,
+    Form,
+    File,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import get_db
+from database import get_db, get_read_db, get_read_sessionmaker
 from services.deps import get_dep_current_user
 from routers.users import get_current_user
 from schemas import ContactCreate
 from typing import List
-from fastapi.templating import Jinja2Templates
+from templating import templates, stream_template
+from services import contact_io
+from cache import contact_cache
+from config import get_settings
 from models import Contact, User
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from datetime import datetime
+import csv
 import schemas, crud, models
 
-templates = Jinja2Templates(directory="templates")
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
@@ -22,28 +36,170 @@ router = APIRouter(prefix="/contacts", tags=["contacts"])
 async def read_contacts(
     request: Request,
     q: str | None = Query(None, description="Пошук за іменем, прізвищем або email"),
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = Query(None, description="Курсор сторінки"),
+    limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     user_id = current_user.id
+    next_cursor = prev_cursor = None
     # Шукаємо контакти, які належать саме цьому користувачу
     if q:
-        contacts = await crud.search_contacts(db, q, user_id)
+        contacts = await contact_cache.search_contacts(db, q, user_id)
     else:
-        contacts = await crud.list_contacts(db, user_id=user_id)
+        contacts, next_cursor, prev_cursor = await contact_cache.list_contacts_page(
+            db, user_id=user_id, cursor=cursor, limit=limit
+        )
+    # ⚡ Рядки таблиці кешуються як готовий HTML до зміни контактів
+    rows_cache_key = await contact_cache.fragment_key(
+        user_id, "contact_rows", {"q": q, "cursor": cursor, "limit": limit}
+    )
 
     # Повертаємо шаблон зі списком контактів
-    return templates.TemplateResponse(
+    return stream_template(
         "contacts.html",
         {
             "request": request,
             "user": current_user,
             "contacts": contacts,
             "query": q or "",
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "rows_cache_key": rows_cache_key,
         },
     )
 
 
+# JSON-варіант списку контактів з тією ж пагінацією
+@router.get("/api", response_model=schemas.ContactPage)
+async def read_contacts_api(
+    cursor: str | None = Query(None, description="Курсор сторінки"),
+    limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    first_name: str | None = None,
+    last_name: str | None = None,
+    email: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    contacts, next_cursor, prev_cursor = await contact_cache.list_contacts_page(
+        db,
+        user_id=current_user.id,
+        cursor=cursor,
+        limit=limit,
+        first_name=first_name,
+        last_name=last_name,
+        email=email,
+    )
+    return {
+        "contacts": contacts,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+
+# Скільки помилок рядків повертати у звіті імпорту
+MAX_REPORTED_ERRORS = 1000
+
+
+# 📥 Імпорт контактів з CSV або vCard
+@router.post("/import")
+async def import_contacts(
+    file: UploadFile = File(..., description="CSV з заголовком або .vcf"),
+    format: str | None = Query(None, pattern="^(csv|vcard)$"),
+    on_conflict: str = Query("skip", pattern="^(skip|update)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    file_format = format or contact_io.detect_format(file.filename, file.content_type)
+    parse = (
+        contact_io.iter_vcard_rows
+        if file_format == "vcard"
+        else contact_io.iter_csv_rows
+    )
+    chunks = contact_io.iter_chunks(parse(file.file))
+
+    total = imported = error_count = 0
+    errors = []
+    while True:
+        # Розбір і валідація пачки — у пулі потоків, щоб не блокувати event loop
+        try:
+            chunk = await run_in_threadpool(next, chunks, None)
+        except (UnicodeDecodeError, csv.Error):
+            raise HTTPException(
+                status_code=400, detail="File must be UTF-8 encoded CSV"
+            )
+        if chunk is None:
+            break
+        contacts, chunk_errors = await run_in_threadpool(
+            contact_io.validate_rows, chunk
+        )
+        written = await crud.import_contacts(
+            db,
+            [contact for _, contact in contacts],
+            current_user.id,
+            overwrite=on_conflict == "update",
+        )
+        # Рядки, які ON CONFLICT пропустив (email уже зайнятий)
+        chunk_errors += [
+            {"row": number, "errors": ["email: contact already exists"]}
+            for number, contact in contacts
+            if contact.email not in written
+        ]
+
+        total += len(chunk)
+        imported += len(written)
+        error_count += len(chunk_errors)
+        chunk_errors.sort(key=lambda e: e["row"])
+        errors.extend(chunk_errors[: MAX_REPORTED_ERRORS - len(errors)])
+
+    return {
+        "total": total,
+        "imported": imported,
+        "failed": error_count,
+        "errors": errors,
+    }
+
+
+# 📤 Потоковий експорт контактів
+@router.get("/export")
+async def export_contacts(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson|vcf)$"),
+    gzip: bool = Query(False, description="Стиснути файл gzip"),
+    first_name: str | None = None,
+    last_name: str | None = None,
+    email: str | None = None,
+    current_user: User = Depends(get_current_user),
+):
+    user_id = current_user.id
+    # Сесія відкривається в генераторі: сесія залежності закривається
+    # раніше, ніж відповідь встигне відстрімитись
+    session_factory = get_read_sessionmaker(request)
+
+    async def body():
+        async with session_factory() as session:
+            batches = crud.stream_contacts(
+                session,
+                user_id,
+                first_name=first_name,
+                last_name=last_name,
+                email=email,
+            )
+            async for chunk in contact_io.export_stream(batches, format, gzip):
+                yield chunk
+
+    media_type, extension = contact_io.EXPORT_FORMATS[format]
+    filename = f"contacts.{extension}"
+    if gzip:
+        media_type, filename = "application/gzip", f"{filename}.gz"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/add")
 async def add_contact_form(request: Request):
     return templates.TemplateResponse("add_contact.html", {"request": request})
@@ -82,9 +238,12 @@ async def create_contact(
 # ✏️ Форма редагування
 @router.get("/edit/{contact_id}")
 async def edit_contact_form(
-    request: Request, contact_id: int, db: AsyncSession = Depends(get_db)
+    request: Request,
+    contact_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
 ):
-    contact = await crud.get_contact(db, contact_id)
+    contact = await crud.get_contact(db, contact_id, owner_id=current_user.id)
     if not contact:
         return RedirectResponse("/contacts", status_code=303)
     return templates.TemplateResponse(
@@ -102,6 +261,7 @@ async def update_contact(
     date_of_birth: str = Form(...),
     information: str = Form(None),
     db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
 ):
     dob = None
     if date_of_birth:
@@ -115,25 +275,33 @@ async def update_contact(
         date_of_birth=dob,
         information=information,
     )
-    await crud.update_contact(db, contact_id, data)
+    await crud.update_contact(db, contact_id, data, owner_id=current_user.id)
     return RedirectResponse("/contacts", status_code=303)
 
 
-# 🎂 API: Дні народження на найближчі 7 днів
+# 🎂 API: Дні народження на найближчі BIRTHDAY_DIGEST_DAYS днів
 @router.get("/birthdays/upcoming")
 async def birthdays_page(
     request: Request,
     current_user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    contacts = await crud.upcoming_birthdays(db, user_id=current_user.id)
+    # Той самий період, що й у денного прогону — сторінка читає готовий результат
+    days = get_settings().BIRTHDAY_DIGEST_DAYS
+    contacts = await contact_cache.upcoming_birthdays(
+        db, user_id=current_user.id, days=days
+    )
     return templates.TemplateResponse(
-        "birthdays.html", {"request": request, "contacts": contacts}
+        "birthdays.html", {"request": request, "contacts": contacts, "days": days}
     )
 
 
 # ❌ Видалення контакту
 @router.get("/delete/{contact_id}")
-async def delete_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
-    await crud.delete_contact(db, contact_id)
+async def delete_contact(
+    contact_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    await crud.delete_contact(db, contact_id, owner_id=current_user.id)
     return RedirectResponse("/contacts", status_code=303)
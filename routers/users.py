@@ -9,14 +9,14 @@ from fastapi import (
     File,
     Form,
 )
-from fastapi.templating import Jinja2Templates
+from templating import templates
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import RedirectResponse, JSONResponse
 from slowapi.util import get_remote_address
 from pydantic import EmailStr
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from services.auth import get_token_from_cookie, create_reset_token
+from services.auth import get_token_from_cookie, create_reset_token, get_token_claims
 from services.email import (
     send_verification_email,
     create_email_confirmation_token,
@@ -27,33 +27,16 @@ from database import get_db
 from models import User, Role
 from config import get_settings
 from jose import jwt, JWTError
-from middleware.rate_limit import limiter
+from middleware.rate_limit import limiter, user_or_ip_key
 from schemas import ResetPasswordRequest
-from services.auth import get_password_hash
+from services.auth import get_password_hash_async
 import crud
-import cloudinary.uploader
 from typing import Optional
-import redis
-import redis.asyncio as aioredis
-import cloudinary
-import cloudinary.uploader
-from services.deps import require_role
+from services.avatars import AVATAR_SIZES, store_avatar
+from services.deps import require_role, get_token_user
+from cache.user_cache import get_or_load_user, delete_user_cache
 import tempfile,os
 
-settings=get_settings()
-
-templates = Jinja2Templates(directory="templates")
-
-cloudinary.config(
-    cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-    api_key=settings.CLOUDINARY_API_KEY,
-    api_secret=settings.CLOUDINARY_API_SECRET,
-    secure=True,
-)
-
-SECRET_KEY = settings.SECRET_KEY
-ALGORITHM = settings.ALGORITHM
-
 RATE_LIMIT = 5  # requests
 RATE_WINDOW = 60  # seconds
 
@@ -61,18 +44,9 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-# create redis connection pool
-redis = None
-
-
-async def get_redis():
-    global redis
-    if redis is None:
-        redis = await aioredis.from_url(settings.REDIS_URL)
-    return redis
-
 
 async def get_current_user(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token_from_cookie),  # Bearer из Authorization
     access_token: str = Cookie(None),  # Cookie
@@ -85,9 +59,7 @@ async def get_current_user(
         )
 
     try:
-        payload = jwt.decode(
-            actual_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = get_token_claims(request, actual_token)
         user_id: int = int(payload.get("sub"))
 
         if user_id is None:
@@ -100,11 +72,14 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
 
-    user = await db.get(User, int(user_id))
+    # ⚡ Claims + token_version (без БД); токен без tv — недійсний
+    user = await get_token_user(db, payload)
     if not user:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
         )
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
 
     # 🚫 Заборона доступу, якщо email не підтверджений
     if not user.is_verified:
@@ -121,8 +96,16 @@ async def get_user_by_id(db: AsyncSession, user_id: int):
 
 
 @router.get("/me")
-@limiter.limit(f"{RATE_LIMIT}/{RATE_WINDOW}seconds")
-async def get_me(request: Request, current_user=Depends(get_current_user)):
+@limiter.limit(f"{RATE_LIMIT}/{RATE_WINDOW}seconds", key_func=user_or_ip_key)
+async def get_me(
+    request: Request,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # Профіль (email, аватар) не входить у claims — кеш Redis, інакше БД
+    current_user = await get_or_load_user(db, current_user.id)
+    if not current_user:
+        raise HTTPException(status_code=404, detail="User not found")
     return {
         "id": current_user.id,
         "email": current_user.email,
@@ -163,6 +146,7 @@ async def reset_password(
     new_password: str = Form(...),
     db: AsyncSession = Depends(get_db),
 ):
+    settings = get_settings()
     try:
         payload = jwt.decode(
             token, key=settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -175,9 +159,12 @@ async def reset_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.hashed_password = get_password_hash(new_password)
+    user.hashed_password = await get_password_hash_async(new_password)
     await db.flush()
     await db.commit()
+    await delete_user_cache(user.id)
+    # Сесії, відкриті зі старим паролем, більше не діють
+    await crud.revoke_user_tokens(db, user.id)
 
     return RedirectResponse(url="/login?info=password_reset_done", status_code=303)
 
@@ -209,13 +196,11 @@ async def upload_avatar(
     current_user=Depends(get_current_user),
     db: AsyncSession = Depends(get_db),    
 ):
-    contents = await file.read()
-    res = cloudinary.uploader.upload(
-        contents, folder="avatars", public_id=f"user_{current_user.id}", overwrite=True
-    )
-    url = res.get("secure_url")
+    # 📦 Обробка і завантаження поза event loop, URL з хешем вмісту
+    urls = await store_avatar(current_user.id, file)
+    url = urls[AVATAR_SIZES[0]]
     await crud.update_avatar(db, current_user, url)
-    return {"avatar_url": url}
+    return {"avatar_url": url, "thumbnails": urls}
 
 
 @router.patch("/default-avatar")
@@ -1,6 +1,15 @@
 from datetime import date
-from typing import Optional
-from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
+from functools import lru_cache
+from typing import List, Optional
+from email_validator import EmailNotValidError, validate_email
+from pydantic import (
+    BaseModel,
+    EmailStr,
+    Field,
+    ConfigDict,
+    field_validator,
+    model_validator,
+)
 
 
 class ContactBase(BaseModel):
@@ -30,6 +39,55 @@ class ContactCreate(ContactBase):
     pass
 
 
+@lru_cache(maxsize=4096)
+def _email_domain(domain: str) -> str:
+    # Перевірка домену (IDNA) — найдорожча частина валідації email
+    return validate_email(f"postmaster@{domain}", check_deliverability=False).domain
+
+
+def _email_local_part(local: str) -> str:
+    # Публічний validate_email з IP-літералом замість домену: перевіряється
+    # лише частина до @, без дорогої IDNA-перевірки домену
+    return validate_email(
+        f"{local}@[127.0.0.1]",
+        check_deliverability=False,
+        allow_domain_literal=True,
+    ).local_part
+
+
+class ContactImport(ContactCreate):
+    """
+    Схема рядка імпорту контактів.
+
+    Та сама валідація, що й у ContactCreate, але домен email перевіряється
+    один раз на домен: у адресній книзі тисячі адрес на кількох доменах.
+
+    """
+
+    # Як у колонці contacts.email (String(200)), інакше INSERT впаде з DataError
+    email: str = Field(..., max_length=200)
+
+    @field_validator("email")
+    @classmethod
+    def validate_email_cached(cls, value: str) -> str:
+        local, at, domain = value.strip().rpartition("@")
+        if not at or not local:
+            raise ValueError(
+                "value is not a valid email address: "
+                "An email address must have an @-sign."
+            )
+        try:
+            local = _email_local_part(local)
+            domain = _email_domain(domain)
+        except EmailNotValidError as e:
+            raise ValueError(f"value is not a valid email address: {e}")
+        return f"{local}@{domain}"
+
+
+# Поля контакту з NOT NULL у таблиці contacts: null для них — помилка валідації
+REQUIRED_CONTACT_FIELDS = ("first_name", "last_name", "email", "phone", "date_of_birth")
+
+
 class ContactUpdate(BaseModel):
     """
     Схема для оновлення інформації про контакт.
@@ -50,6 +108,65 @@ class ContactUpdate(BaseModel):
     date_of_birth: Optional[date] = None
     information: Optional[str] = None
 
+    @model_validator(mode="after")
+    def reject_null_required(self):
+        # Поле можна не передавати, але не можна обнулити
+        empty = [
+            name
+            for name in REQUIRED_CONTACT_FIELDS
+            if name in self.model_fields_set and getattr(self, name) is None
+        ]
+        if empty:
+            raise ValueError(f"{', '.join(empty)} cannot be empty")
+        return self
+
+
+class ContactSelection(BaseModel):
+    """
+    Вибір контактів для пакетних операцій.
+
+    Фільтри поєднуються через OR (як у списку контактів), а разом з ``ids``
+    — через AND. Потрібно вказати хоча б щось одне.
+
+    :param ids: Ідентифікатори контактів.
+    :param first_name: Фільтр за ім'ям.
+    :param last_name: Фільтр за прізвищем.
+    :param email: Фільтр за email.
+
+    """
+
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=100_000)
+    first_name: Optional[str] = Field(None, min_length=1)
+    last_name: Optional[str] = Field(None, min_length=1)
+    email: Optional[str] = Field(None, min_length=1)
+
+    @model_validator(mode="after")
+    def require_selection(self):
+        if not (self.ids or self.first_name or self.last_name or self.email):
+            raise ValueError("Specify ids or at least one filter")
+        return self
+
+
+class ContactBulkUpdate(ContactSelection):
+    """
+    Пакетне оновлення контактів.
+
+    :param values: Нові значення полів (email змінювати пакетно не можна).
+
+    """
+
+    values: ContactUpdate
+
+    @field_validator("values")
+    @classmethod
+    def check_values(cls, values: ContactUpdate) -> ContactUpdate:
+        if not values.model_fields_set:
+            raise ValueError("Nothing to update")
+        if "email" in values.model_fields_set:
+            raise ValueError("email is unique and cannot be updated in bulk")
+        # null для NOT NULL-полів відхиляє сама ContactUpdate
+        return values
+
 
 class ContactOut(ContactBase):
     """
@@ -65,6 +182,21 @@ class ContactOut(ContactBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ContactPage(BaseModel):
+    """
+    Схема сторінки контактів з keyset-пагінацією.
+
+    :param contacts: Контакти поточної сторінки.
+    :param next_cursor: Курсор наступної сторінки (якщо є).
+    :param prev_cursor: Курсор попередньої сторінки (якщо є).
+
+    """
+
+    contacts: List[ContactOut]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
 class ContactInDB(ContactBase):
     """
     Схема для внутрішнього використання, що включає ID контакту.
@@ -1,13 +1,32 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from enum import Enum
 from jose import jwt
 from passlib.context import CryptContext
 from config import get_settings
 from fastapi import HTTPException, Request
+import asyncio
+import hashlib
+import os
+import threading
+import time
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 MAX_BCRYPT_LENGTH = 72
 
+# LRU нещодавно перевірених access-токенів: sha256(token) -> claims
+TOKEN_CACHE_SIZE = 1024
+_verified_tokens: "OrderedDict[bytes, dict]" = OrderedDict()
+
+
+# Пул потоків для bcrypt: bcrypt відпускає GIL, тому потоки масштабуються на ядра
+_hash_executor: ThreadPoolExecutor | None = None
+_hash_stats = {"pending": 0, "rejected": 0, "completed": 0}
+# Лічильник змінюють і event loop, і потоки пулу
+_hash_lock = threading.Lock()
+
 
 def get_password_hash(password: str):
     truncated = password[:MAX_BCRYPT_LENGTH]
@@ -18,19 +37,124 @@ def verify_password(plain: str, hashed: str):
     return pwd_context.verify(plain, hashed)
 
 
+def _hash_workers() -> int:
+    return get_settings().PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=_hash_workers(), thread_name_prefix="bcrypt"
+        )
+    return _hash_executor
+
+
+def _hash_release(completed: bool = True):
+    with _hash_lock:
+        _hash_stats["pending"] -= 1
+        if completed:
+            _hash_stats["completed"] += 1
+
+
+def _run_counted(fn, *args):
+    # Потік пулу не переривається скасуванням запиту — місце звільняється,
+    # лише коли bcrypt справді завершився
+    try:
+        return fn(*args)
+    finally:
+        _hash_release()
+
+
+def _release_if_cancelled(future):
+    # Задачу, скасовану ще в черзі пулу, потік не запускає
+    if future.cancelled():
+        _hash_release(completed=False)
+
+
+async def _run_in_hash_pool(fn, *args):
+    """Виконання bcrypt у пулі потоків з обмеженою чергою.
+
+    Якщо пул і черга заповнені, повертає 429, щоб сплеск логінів
+    не блокував інші запити воркера.
+    """
+    settings = get_settings()
+    if _hash_stats["pending"] >= _hash_workers() + settings.PASSWORD_HASH_QUEUE:
+        _hash_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": "1"},
+        )
+
+    with _hash_lock:
+        _hash_stats["pending"] += 1
+    future = _get_hash_executor().submit(_run_counted, fn, *args)
+    future.add_done_callback(_release_if_cancelled)
+    return await asyncio.wrap_future(future)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain, hashed)
+
+
+def get_hash_pool_stats() -> dict:
+    """Стан пулу bcrypt: воркери, задачі в роботі та в черзі, відмови."""
+    workers = _hash_workers()
+    pending = _hash_stats["pending"]
+    return {
+        "workers": workers,
+        "running": min(pending, workers),
+        "queued": max(0, pending - workers),
+        "rejected": _hash_stats["rejected"],
+        "completed": _hash_stats["completed"],
+    }
+
+
 def create_access_token(
-    subject: str | int, role: str, expires_delta: timedelta | None = None
+    subject: str | int,
+    role: str,
+    expires_delta: timedelta | None = None,
+    **claims,
 ):
+    """Access-токен; ``claims`` — додаткові поля (див. ``user_token_claims``)"""
     settings=get_settings()
 
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    to_encode = {"sub": str(subject), "role": role, "type": "access", "exp": expire}
+    to_encode = {
+        **claims,
+        "sub": str(subject),
+        "role": role,
+        "type": "access",
+        "exp": expire,
+    }
     encoded = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded
 
 
+def user_token_claims(user) -> dict:
+    """
+    Claims користувача для access-токена: роль, статус і версія токенів.
+
+    За ``tv`` (token_version) залежності перевіряють, що токен не
+    відкликано, і не читають користувача з БД на кожен запит.
+
+    """
+    role = user.role or "user"  # role NULL у старих записах users
+    return {
+        "role": role.value if isinstance(role, Enum) else role,
+        "is_verified": bool(user.is_verified),
+        "is_active": bool(user.is_active),
+        "tv": user.token_version or 0,
+    }
+
+
 def create_temp_token(subject: str | int, expires_delta: timedelta | None = None):
     settings=get_settings()
 
@@ -42,13 +166,19 @@ def create_temp_token(subject: str | int, expires_delta: timedelta | None = None
     return encoded
 
 
-def create_refresh_token(subject: str | int, expires_delta: timedelta | None = None):
+def create_refresh_token(
+    subject: str | int,
+    expires_delta: timedelta | None = None,
+    token_version: int | None = None,
+):
     settings=get_settings()
 
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     )
     to_encode = {"sub": str(subject), "exp": expire}
+    if token_version is not None:
+        to_encode["tv"] = token_version
     encoded = jwt.encode(
         to_encode, settings.REFRESH_SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -61,6 +191,45 @@ def decode_access_token(token: str):
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
 
 
+def decode_access_token_cached(token: str) -> dict:
+    """Декодування access-токена з LRU-кешем перевірених токенів.
+
+    Ключ кешу — хеш токена, запис діє до ``exp`` з claims.
+    Повертає спільний dict claims, який не слід змінювати.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _verified_tokens.get(key)
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            _verified_tokens.move_to_end(key)
+            return payload
+        del _verified_tokens[key]
+
+    payload = decode_access_token(token)  # JWTError, якщо токен невалідний
+    _verified_tokens[key] = payload
+    while len(_verified_tokens) > TOKEN_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
+    return payload
+
+
+def get_token_claims(request: Request, token: str | None = None) -> dict:
+    """Claims access-токена поточного запиту.
+
+    Якщо ``AuthMiddleware`` вже перевірив цей токен, claims беруться з
+    ``request.state`` без повторного декодування.
+    """
+    if token is None:
+        token = request.cookies.get("access_token")
+        if not token:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        token = token.replace("Bearer ", "")
+
+    state = request.state
+    if getattr(state, "access_token", None) == token:
+        return state.token_claims
+    return decode_access_token_cached(token)
+
+
 def verify_token(token: str):
     try:
         payload = decode_access_token(token)
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO
+
+from fastapi import HTTPException, UploadFile
+
+from config import get_settings
+
+# Розміри мініатюр (квадрат, px); перший — основний avatar_url
+AVATAR_SIZES = (256, 128, 64)
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Захист від "decompression bomb": більші зображення не декодуються
+MAX_IMAGE_PIXELS = 40_000_000
+
+_executor: ProcessPoolExecutor | None = None
+_storage = None
+
+
+async def spool_upload(file: UploadFile, max_bytes: int) -> IO[bytes]:
+    """
+    Копіювання завантаження частинами у тимчасовий файл.
+
+    Перевищення ``max_bytes`` — 413 одразу, без дочитування файлу. Файл
+    має ім'я, тож його читає процес пулу, а не event loop; видаляється
+    при закритті.
+
+    """
+    spool = tempfile.NamedTemporaryFile()
+    size = 0
+    try:
+        while chunk := await file.read(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail="Avatar file is too large")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    if not size:
+        spool.close()
+        raise HTTPException(status_code=400, detail="Empty file")
+    spool.flush()
+    return spool
+
+
+def render_thumbnails(data: bytes, sizes: tuple[int, ...] = AVATAR_SIZES) -> dict[int, bytes]:
+    """
+    Декодування, обрізка до квадрата та перекодування в JPEG кожного розміру.
+
+    Виконується в процесі пулу; некоректне зображення — ValueError.
+
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Invalid image: {e}") from None
+
+    thumbnails = {}
+    for size in sizes:
+        thumb = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        thumb.save(buffer, "JPEG", quality=85, optimize=True, progressive=True)
+        thumbnails[size] = buffer.getvalue()
+    return thumbnails
+
+
+def render_avatar_file(
+    path: str, sizes: tuple[int, ...] = AVATAR_SIZES
+) -> tuple[str, dict[int, bytes]]:
+    """
+    Читання завантаженого файлу, хеш вмісту та мініатюри.
+
+    Виконується в процесі пулу: вміст файлу не читається в event loop.
+
+    :return: (хеш вмісту, мініатюри за розміром)
+
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    return hashlib.sha256(data).hexdigest()[:16], render_thumbnails(data, sizes)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=get_settings().AVATAR_WORKERS)
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class LocalAvatarStorage:
+    """Збереження у файлову систему (роздається через /static); працює офлайн"""
+
+    def __init__(self, directory: str, base_url: str):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+
+    def _write(self, name: str, data: bytes):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Запис через тимчасовий файл: читач не побачить частково записаний файл
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def save(self, name: str, data: bytes) -> str:
+        await asyncio.to_thread(self._write, f"{name}.jpg", data)
+        return f"{self.base_url}/{name}.jpg"
+
+
+class CloudinaryAvatarStorage:
+    """Завантаження в Cloudinary (синхронний SDK — у потоці, поза event loop)"""
+
+    def __init__(self, folder: str = "avatars"):
+        import cloudinary
+
+        # SDK імпортується й налаштовується лише при першому завантаженні
+        settings = get_settings()
+        cloudinary.config(
+            cloud_name=settings.CLOUDINARY_CLOUD_NAME,
+            api_key=settings.CLOUDINARY_API_KEY,
+            api_secret=settings.CLOUDINARY_API_SECRET,
+            secure=True,
+        )
+        self.folder = folder
+
+    def _upload(self, name: str, data: bytes) -> str:
+        import cloudinary.uploader
+
+        result = cloudinary.uploader.upload(
+            data,
+            folder=self.folder,
+            public_id=name,
+            overwrite=False,
+            resource_type="image",
+        )
+        return result["secure_url"]
+
+    async def save(self, name: str, data: bytes) -> str:
+        return await asyncio.to_thread(self._upload, name, data)
+
+
+def get_avatar_storage():
+    """Сховище аватарок за налаштуванням AVATAR_STORAGE"""
+    global _storage
+    if _storage is None:
+        settings = get_settings()
+        if settings.AVATAR_STORAGE == "local":
+            _storage = LocalAvatarStorage(
+                settings.AVATAR_LOCAL_DIR, settings.AVATAR_LOCAL_URL
+            )
+        elif settings.AVATAR_STORAGE == "cloudinary":
+            _storage = CloudinaryAvatarStorage()
+        else:
+            raise RuntimeError(f"Unknown AVATAR_STORAGE: {settings.AVATAR_STORAGE}")
+    return _storage
+
+
+async def store_avatar(user_id: int, file: UploadFile) -> dict[int, str]:
+    """
+
+    Обробка та збереження аватарки користувача.
+
+    Файл читається частинами з обмеженням розміру, мініатюри рендеряться
+    в пулі процесів, а всі розміри завантажуються у сховище паралельно.
+    Імена містять хеш вмісту, тож URL змінюється разом із зображенням
+    і його можна кешувати без обмеження часу.
+
+    :param user_id: Ідентифікатор користувача
+    :param file: Завантажений файл
+    :return: URL мініатюр за розміром
+
+    """
+    loop = asyncio.get_running_loop()
+    with await spool_upload(file, get_settings().AVATAR_MAX_BYTES) as spool:
+        try:
+            digest, thumbnails = await loop.run_in_executor(
+                _get_executor(), render_avatar_file, spool.name, AVATAR_SIZES
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid image file")
+
+    storage = get_avatar_storage()
+    urls = await asyncio.gather(
+        *(
+            storage.save(f"user_{user_id}/{digest}_{size}", thumb)
+            for size, thumb in thumbnails.items()
+        )
+    )
+    return dict(zip(thumbnails, urls))
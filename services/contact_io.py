@@ -0,0 +1,300 @@
+import codecs
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, BinaryIO, Iterator
+
+from pydantic import ValidationError
+
+from schemas import ContactCreate, ContactImport
+
+# Кількість рядків, що валідуються і вставляються одним INSERT
+IMPORT_CHUNK_SIZE = 1000
+
+CONTACT_FIELDS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "date_of_birth",
+    "information",
+)
+
+# Альтернативні назви колонок CSV
+CSV_ALIASES = {
+    "birthday": "date_of_birth",
+    "bday": "date_of_birth",
+    "notes": "information",
+    "note": "information",
+    "tel": "phone",
+}
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str:
+    """Формат файлу імпорту: ``vcard`` або ``csv``"""
+    name = (filename or "").lower()
+    if name.endswith((".vcf", ".vcard")) or (content_type or "").startswith(
+        ("text/vcard", "text/x-vcard")
+    ):
+        return "vcard"
+    return "csv"
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[dict]:
+    """
+    Потоковий розбір CSV з заголовком.
+
+    Файл читається порядково через TextIOWrapper, тож у пам'яті лише
+    поточний рядок; BOM на початку файлу ігнорується.
+
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        if reader.fieldnames:
+            reader.fieldnames = [
+                CSV_ALIASES.get(name, name)
+                for name in (f.strip().lower() for f in reader.fieldnames)
+            ]
+        for row in reader:
+            yield {
+                key: value.strip()
+                for key, value in row.items()
+                if key in CONTACT_FIELDS and value is not None
+            }
+    finally:
+        # Не закриваємо файл завантаження разом з обгорткою
+        text.detach()
+
+
+def _unfold(lines: Iterator[str]) -> Iterator[str]:
+    """Склеювання перенесених рядків vCard (продовження починається з пробілу)"""
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _vcard_date(value: str) -> str:
+    value = value.strip()
+    if len(value) == 8 and value.isdigit():
+        return datetime.strptime(value, "%Y%m%d").date().isoformat()
+    return value[:10]
+
+
+def iter_vcard_rows(stream: BinaryIO) -> Iterator[dict]:
+    """
+    Потоковий розбір vCard (3.0/4.0): одна картка — один контакт.
+
+    Беруться N (або FN), EMAIL, TEL, BDAY та NOTE; з кількох EMAIL/TEL
+    використовується перший.
+
+    """
+    decoder = codecs.getreader("utf-8-sig")(stream, errors="replace")
+    card = None
+    for line in _unfold(decoder):
+        name, _, value = line.partition(":")
+        prop = name.split(";", 1)[0].split(".")[-1].upper()
+        if prop == "BEGIN" and value.strip().upper() == "VCARD":
+            card = {}
+        elif prop == "END" and card is not None:
+            yield card
+            card = None
+        elif card is None:
+            continue
+        elif prop == "N":
+            parts = value.split(";")
+            card["last_name"] = parts[0].strip()
+            if len(parts) > 1:
+                card["first_name"] = parts[1].strip()
+        elif prop == "FN" and "first_name" not in card:
+            first, _, last = value.strip().partition(" ")
+            card.setdefault("first_name", first)
+            card.setdefault("last_name", last)
+        elif prop == "EMAIL":
+            card.setdefault("email", value.strip())
+        elif prop == "TEL":
+            card.setdefault("phone", value.strip())
+        elif prop == "BDAY":
+            card["date_of_birth"] = _vcard_date(value)
+        elif prop == "NOTE":
+            card["information"] = value.replace("\\n", "\n").replace("\\,", ",")
+
+
+def validate_rows(
+    rows: list[tuple[int, dict]],
+) -> tuple[list[tuple[int, ContactCreate]], list[dict]]:
+    """
+    Валідація пачки рядків схемою ContactImport.
+
+    :param rows: Пари (номер рядка, сирі значення)
+    :return: Валідні контакти з номерами рядків та помилки ``{"row", "errors"}``
+
+    """
+    contacts, errors, seen = [], [], set()
+    for number, raw in rows:
+        data = {key: value for key, value in raw.items() if value != ""}
+        try:
+            contact = ContactImport(**data)
+        except ValidationError as e:
+            errors.append(
+                {
+                    "row": number,
+                    "errors": [
+                        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}"
+                        for err in e.errors()
+                    ],
+                }
+            )
+            continue
+        if contact.date_of_birth is None:
+            errors.append({"row": number, "errors": ["date_of_birth: Field required"]})
+            continue
+        # Один INSERT ... ON CONFLICT не може двічі зачепити той самий email
+        if contact.email in seen:
+            errors.append({"row": number, "errors": ["email: duplicate in file"]})
+            continue
+        seen.add(contact.email)
+        contacts.append((number, contact))
+    return contacts, errors
+
+
+def iter_chunks(
+    rows: Iterator[dict], size: int = IMPORT_CHUNK_SIZE
+) -> Iterator[list[tuple[int, dict]]]:
+    """Пронумеровані рядки пачками по ``size``"""
+    chunk = []
+    for number, row in enumerate(rows, start=1):
+        chunk.append((number, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Формат експорту -> (media type, розширення файлу)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "vcf": ("text/vcard", "vcf"),
+}
+
+
+def _csv_chunk(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(("id",) + CONTACT_FIELDS)
+    for row in rows:
+        writer.writerow(
+            (
+                row.id,
+                row.first_name,
+                row.last_name,
+                row.email,
+                row.phone,
+                row.date_of_birth.isoformat() if row.date_of_birth else "",
+                row.information or "",
+            )
+        )
+    return buffer.getvalue()
+
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps(
+            {
+                "id": row.id,
+                "first_name": row.first_name,
+                "last_name": row.last_name,
+                "email": row.email,
+                "phone": row.phone,
+                "date_of_birth": (
+                    row.date_of_birth.isoformat() if row.date_of_birth else None
+                ),
+                "information": row.information,
+            },
+            ensure_ascii=False,
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+def _vcard_escape(value: str | None) -> str:
+    return (
+        (value or "")
+        .replace("\\", "\\\\")
+        .replace(",", "\\,")
+        .replace(";", "\\;")
+        .replace("\n", "\\n")
+    )
+
+
+def _vcard_chunk(rows) -> str:
+    cards = []
+    for row in rows:
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:3.0",
+            f"N:{_vcard_escape(row.last_name)};{_vcard_escape(row.first_name)};;;",
+            f"FN:{_vcard_escape(f'{row.first_name} {row.last_name}')}",
+            f"EMAIL;TYPE=INTERNET:{row.email}",
+            f"TEL:{_vcard_escape(row.phone)}",
+        ]
+        if row.date_of_birth:
+            lines.append(f"BDAY:{row.date_of_birth.isoformat()}")
+        if row.information:
+            lines.append(f"NOTE:{_vcard_escape(row.information)}")
+        lines.append("END:VCARD")
+        cards.append("\r\n".join(lines) + "\r\n")
+    return "".join(cards)
+
+
+async def export_stream(
+    batches: AsyncIterator[list], file_format: str, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Серіалізація пачок рядків у CSV, NDJSON або vCard.
+
+    Кожна пачка одразу віддається клієнту, тож у пам'яті лише одна пачка;
+    при ``compress`` потік стискається gzip на льоту.
+
+    :param batches: Асинхронний ітератор пачок рядків контактів
+    :param file_format: ``csv``, ``ndjson`` або ``vcf``
+    :param compress: Стискати вивід gzip
+    :return: Асинхронний ітератор байтів
+
+    """
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return gzip.compress(data) if gzip is not None else data
+
+    first = True
+    async for rows in batches:
+        if file_format == "csv":
+            data = encode(_csv_chunk(rows, header=first))
+        elif file_format == "ndjson":
+            data = encode(_ndjson_chunk(rows))
+        else:
+            data = encode(_vcard_chunk(rows))
+        first = False
+        if data:
+            yield data
+    if first and file_format == "csv":
+        # Порожній експорт CSV — лише заголовок
+        yield encode(_csv_chunk([], header=True))
+    if gzip is not None:
+        yield gzip.flush()
@@ -2,10 +2,10 @@ from fastapi import Request, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
-from services.auth import decode_access_token
+from services.auth import decode_access_token_cached, get_token_claims
 from jose import JWTError
 from sqlalchemy.future import select
-from cache.user_cache import get_cached_user, cache_user
+from cache.token_version import get_token_version
 from config import get_settings
 from jose import JWTError, jwt
 import models
@@ -13,6 +13,40 @@ import models
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
+async def token_is_current(db: AsyncSession, payload: dict) -> bool:
+    """Чи не відкликано токен: ``tv`` з claims збігається з token_version користувача"""
+    if "tv" not in payload:
+        # Токен без версії неможливо відкликати — вважається недійсним
+        return False
+    return await get_token_version(db, int(payload["sub"])) == payload["tv"]
+
+
+async def get_token_user(db: AsyncSession, payload: dict) -> models.User | None:
+    """
+
+    Користувач access-токена.
+
+    Достатньо перевірити версію (``tv``) — роль і статус беруться з
+    claims, користувач не читається з БД. None — токен без ``tv``,
+    відкликаний або з невідомою роллю.
+
+    """
+    user_id = int(payload.get("sub"))
+    if not await token_is_current(db, payload):
+        return None
+    try:
+        # role NULL у старих записах users — звичайний користувач
+        role = models.Role(payload.get("role") or models.Role.user)
+    except ValueError:
+        return None
+    return models.User(
+        id=user_id,
+        role=role,
+        is_active=payload.get("is_active", True),
+        is_verified=payload.get("is_verified", False),
+    )
+
+
 async def get_dep_current_user(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
 ) -> models.User:
@@ -24,35 +58,24 @@ async def get_dep_current_user(
 
     # Декодування JWT
     try:
-        payload = decode_access_token(token)
+        payload = decode_access_token_cached(token)
         user_id = int(payload.get("sub"))
     except (JWTError, Exception):
         raise credentials_exception
 
-    # Кешування з Redis
-    cached = await get_cached_user(user_id)
-    if cached:
-        return cached  # ⚡ взяли з кешу
-
-    # Інакше — з БД
-    stmt = select(models.User).where(models.User.id == user_id)
-    res = await db.execute(stmt)
-    user = res.scalars().first()
+    # ⚡ Claims + token_version, без запиту користувача до БД
+    user = await get_token_user(db, payload)
     if not user:
         raise credentials_exception
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
-    # Сохраняемо в Redis
-    await cache_user(user)
-
     return user
 
 
 def require_role(required_role: models.Role):
-    settings=get_settings()
-    
-    def wrapper(request: Request):
+
+    async def wrapper(request: Request, db: AsyncSession = Depends(get_db)):
         token = request.cookies.get("access_token")
         if not token:
             raise HTTPException(
@@ -62,13 +85,17 @@ def require_role(required_role: models.Role):
         if token.startswith("Bearer "):
             token = token[7:]
         try:
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-            )
-        except jwt.JWTError:
+            # claims з AuthMiddleware, інакше — LRU перевірених токенів
+            payload = get_token_claims(request, token)
+        except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
             )
+        # Після зміни ролі версія токенів збільшується — старий токен недійсний
+        if not await token_is_current(db, payload):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
+            )
         role = payload.get("role")
         if role != required_role:
             raise HTTPException(
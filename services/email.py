@@ -1,6 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import RedirectResponse
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from jose import jwt
 from jose.exceptions import JWTError, ExpiredSignatureError
 from email.message import EmailMessage
@@ -8,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from models import Contact, User
 from database import get_db
-import smtplib
+from cache.user_cache import delete_user_cache
 from datetime import datetime, timedelta
 
 _settings=None
@@ -22,22 +21,16 @@ def get_email_settings():
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-settings=get_email_settings()
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.SMTP_USER,
-    MAIL_PASSWORD=settings.SMTP_PASS,
-    MAIL_FROM=settings.SMTP_USER,
-    MAIL_PORT=settings.SMTP_PORT,
-    MAIL_SERVER=settings.SMTP_HOST,
-    MAIL_FROM_NAME="Contacts App",
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-)
+def get_mailer():
+    """Черга відправки пошти; aiosmtplib імпортується лише з першим листом"""
+    from services.mailer import get_mailer as get_mail_queue
 
+    return get_mail_queue()
 
-# helper to send verification email (simple SMTP)
+
+
+# helper to send verification email (через чергу services.mailer)
 async def send_verification_email(to_email: str, token: str):
     settings = get_email_settings()
     verify_link = (
@@ -48,8 +41,7 @@ async def send_verification_email(to_email: str, token: str):
     msg["From"] = "no-reply@example.com"
     msg["To"] = to_email
     msg.set_content(f"Click to verify: {verify_link}")
-    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as smtp:
-        smtp.send_message(msg)
+    await get_mailer().enqueue(msg)
 
 
 async def get_user_by_email(db: AsyncSession, email: str):
@@ -99,6 +91,7 @@ async def confirm_email(token: str = Query(...), db: AsyncSession = Depends(get_
     user.is_verified = True
     db.add(user)
     await db.commit()
+    await delete_user_cache(user.id)
 
     return RedirectResponse("/login?info=email_verified", status_code=303)
 
@@ -106,11 +99,24 @@ async def confirm_email(token: str = Query(...), db: AsyncSession = Depends(get_
 async def send_reset_email(to_email: str, token: str):
     settings = get_email_settings()
     reset_link = f"http://localhost:{settings.SERVER_PORT}/users/reset-password?email={to_email}&token={token}"
-    # mail sending code here (MailHog / SMTP)
+    # лист іде в чергу, відправка — воркерами services.mailer (MailHog / SMTP)
     msg = EmailMessage()
     msg["Subject"] = "Verify your account"
     msg["From"] = "no-reply@example.com"
     msg["To"] = to_email
     msg.set_content(f"Click to reset your password: {reset_link}")
-    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as smtp:
-        smtp.send_message(msg)
+    await get_mailer().enqueue(msg)
+
+
+async def send_birthday_digest(to_email: str, contacts):
+    """Лист з найближчими днями народження контактів (через чергу services.mailer)"""
+    lines = [
+        f"{c.date_of_birth:%d.%m} — {c.first_name} {c.last_name} ({c.email}, {c.phone})"
+        for c in contacts
+    ]
+    msg = EmailMessage()
+    msg["Subject"] = "Upcoming birthdays"
+    msg["From"] = "no-reply@example.com"
+    msg["To"] = to_email
+    msg.set_content("Upcoming birthdays of your contacts:\n\n" + "\n".join(lines))
+    await get_mailer().enqueue(msg)
@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+
+import aiosmtplib
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Redis-список для листів, які не вдалося доставити
+DEAD_LETTER_KEY = "mail:dead"
+
+
+@dataclass
+class Envelope:
+    """Лист у черзі разом з кількістю спроб доставки."""
+
+    message: EmailMessage
+    attempts: int = 0
+    last_error: str | None = None
+    queued_at: float = field(default_factory=time.time)
+
+
+class SMTPConnectionPool:
+    """
+    Пул постійних SMTP-з'єднань (aiosmtplib).
+
+    Вільні з'єднання повторно використовуються, поки сервер їх не закриє;
+    розірване з'єднання відкидається і при наступному запиті відкривається нове.
+
+    """
+
+    def __init__(self, host: str, port: int, size: int = 2, **options):
+        self.host = host
+        self.port = port
+        self.options = options
+        self._idle: asyncio.LifoQueue = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(hostname=self.host, port=self.port, **self.options)
+        await smtp.connect()
+        return smtp
+
+    async def acquire(self) -> aiosmtplib.SMTP:
+        await self._slots.acquire()
+        try:
+            while not self._idle.empty():
+                smtp = self._idle.get_nowait()
+                if smtp.is_connected:
+                    return smtp
+            return await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, smtp: aiosmtplib.SMTP, healthy: bool = True):
+        if healthy and smtp.is_connected:
+            self._idle.put_nowait(smtp)
+        else:
+            smtp.close()
+        self._slots.release()
+
+    async def close(self):
+        while not self._idle.empty():
+            smtp = self._idle.get_nowait()
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+
+class MailDispatcher:
+    """
+    Асинхронна відправка пошти поза запитом.
+
+    ``enqueue`` лише кладе лист у чергу; воркери забирають листи пачками,
+    відправляють їх через пул SMTP-з'єднань, повторюють тимчасові помилки з
+    експоненційною затримкою, а листи після вичерпання спроб (або з
+    постійною помилкою 5xx) переносять у dead-letter.
+
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int = 2,
+        pool_size: int = 2,
+        batch_size: int = 20,
+        max_retries: int = 5,
+        retry_base_delay: float = 1.0,
+        queue_size: int = 1000,
+        dead_letter_size: int = 1000,
+        **smtp_options,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.queue_size = queue_size
+        self.smtp_options = smtp_options
+        self.dead_letters: deque = deque(maxlen=dead_letter_size)
+        self.stats = {"sent": 0, "retried": 0, "dead": 0}
+        self._loop = None
+        self._queue: asyncio.Queue | None = None
+        self._pool: SMTPConnectionPool | None = None
+        self._tasks: list[asyncio.Task] = []
+        # Листи, що чекають на повтор: id -> (таймер, лист)
+        self._retries: dict[int, tuple[asyncio.TimerHandle, Envelope]] = {}
+        # Незавершені записи dead-letter у Redis (посилання, щоб їх не зібрав GC)
+        self._dead_letter_tasks: set[asyncio.Task] = set()
+        self._stopping = False
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # Новий event loop (перезапуск застосунку або тести) — нові черга та пул
+        self._loop = loop
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._pool = SMTPConnectionPool(
+            self.host, self.port, size=self.pool_size, **self.smtp_options
+        )
+        self._tasks = [
+            loop.create_task(self._worker(), name=f"mail-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def enqueue(self, message: EmailMessage):
+        """Поставити лист у чергу відправки (не чекає на SMTP-сервер)."""
+        self._ensure_started()
+        self._put(Envelope(message))
+
+    def _put(self, envelope: Envelope):
+        try:
+            self._queue.put_nowait(envelope)
+        except asyncio.QueueFull:
+            envelope.last_error = "mail queue is full"
+            self._dead_letter(envelope)
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._send_batch(batch)
+            except Exception:
+                logger.exception("Mail worker failed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _send_batch(self, batch: list[Envelope]):
+        try:
+            smtp = await self._pool.acquire()
+        except (aiosmtplib.SMTPException, OSError) as e:
+            for envelope in batch:
+                self._failed(envelope, e)
+            return
+
+        healthy = True
+        try:
+            for i, envelope in enumerate(batch):
+                try:
+                    await smtp.send_message(envelope.message)
+                    self.stats["sent"] += 1
+                except aiosmtplib.SMTPServerDisconnected as e:
+                    # З'єднання втрачено — решта пачки піде на повтор
+                    healthy = False
+                    for rest in batch[i:]:
+                        self._failed(rest, e)
+                    break
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    self._failed(envelope, e)
+        finally:
+            self._pool.release(smtp, healthy)
+
+    def _failed(self, envelope: Envelope, error: Exception):
+        envelope.attempts += 1
+        envelope.last_error = str(error)
+        permanent = isinstance(error, aiosmtplib.SMTPRecipientsRefused) or (
+            isinstance(error, aiosmtplib.SMTPResponseException) and error.code >= 500
+        )
+        if permanent or self._stopping or envelope.attempts > self.max_retries:
+            # Під час зупинки повтору вже не буде — лист не губиться, а йде в dead-letter
+            self._dead_letter(envelope)
+            return
+
+        delay = self.retry_base_delay * 2 ** (envelope.attempts - 1)
+        self.stats["retried"] += 1
+        logger.info(
+            "Mail to %s failed (%s), retry %d in %.1fs",
+            envelope.message["To"],
+            error,
+            envelope.attempts,
+            delay,
+        )
+        handle = self._loop.call_later(delay, self._requeue, envelope)
+        self._retries[id(envelope)] = (handle, envelope)
+
+    def _requeue(self, envelope: Envelope):
+        self._retries.pop(id(envelope), None)
+        self._put(envelope)
+
+    def _dead_letter(self, envelope: Envelope):
+        self.stats["dead"] += 1
+        self.dead_letters.append(envelope)
+        logger.error(
+            "Mail to %s moved to dead letters: %s",
+            envelope.message["To"],
+            envelope.last_error,
+        )
+        if self._loop is not None:
+            task = self._loop.create_task(self._store_dead_letter(envelope))
+            self._dead_letter_tasks.add(task)
+            task.add_done_callback(self._dead_letter_tasks.discard)
+
+    async def _store_dead_letter(self, envelope: Envelope):
+        from cache.redis_client import get_redis_client, redis_errors
+
+        try:
+            redis = get_redis_client()
+            await redis.lpush(DEAD_LETTER_KEY, envelope.message.as_string())
+            await redis.ltrim(DEAD_LETTER_KEY, 0, self.dead_letters.maxlen - 1)
+        except redis_errors() as e:
+            logger.warning("Dead letter not stored in Redis: %s", e)
+
+    async def drain(self, timeout: float = 10.0):
+        """Дочекатися відправки листів, що вже в черзі."""
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Mail queue not drained: %d left", self.queued)
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Зупинка воркерів після спроби відправити чергу.
+
+        Листи, що чекають на повтор, отримують останню спробу одразу;
+        усе, що не відправлено до ``timeout``, переноситься в dead-letter.
+
+        """
+        if not self._tasks:
+            return
+        self._stopping = True
+        for handle, envelope in list(self._retries.values()):
+            handle.cancel()
+            self._put(envelope)
+        self._retries.clear()
+        await self.drain(timeout)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            envelope = self._queue.get_nowait()
+            envelope.last_error = envelope.last_error or "mailer stopped"
+            self._dead_letter(envelope)
+        await asyncio.gather(*self._dead_letter_tasks, return_exceptions=True)
+        await self._pool.close()
+
+
+_mailer: MailDispatcher | None = None
+
+
+def get_mailer() -> MailDispatcher:
+    """Спільний диспетчер пошти, налаштований з Settings"""
+    global _mailer
+    if _mailer is None:
+        settings = get_settings()
+        _mailer = MailDispatcher(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            workers=settings.MAIL_WORKERS,
+            pool_size=settings.MAIL_POOL_SIZE,
+            batch_size=settings.MAIL_BATCH_SIZE,
+            max_retries=settings.MAIL_MAX_RETRIES,
+            queue_size=settings.MAIL_QUEUE_SIZE,
+            start_tls=settings.SMTP_STARTTLS,
+        )
+    return _mailer
+
+
+async def stop_mailer():
+    if _mailer is not None:
+        await _mailer.stop()
@@ -0,0 +1,181 @@
+import time
+from contextvars import ContextVar
+
+import jinja2
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Мітка route — шаблон маршруту (/contacts/edit/{contact_id}), а не сирий шлях,
+# щоб кількість часових рядів не залежала від ідентифікаторів у URL.
+UNMATCHED_ROUTE = "__unmatched__"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being processed",
+    ["method"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "DB queries per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Total DB query time per HTTP request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+REDIS_COMMANDS = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round-trip time by command",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+TEMPLATE_RENDER = Histogram(
+    "template_render_seconds",
+    "Jinja2 template render time",
+    ["template"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+# Лічильник запитів до БД поточного HTTP-запиту: [кількість, секунди]
+_request_db: ContextVar[list | None] = ContextVar("request_db", default=None)
+
+
+def start_request_db_tracking():
+    return _request_db.set([0, 0.0])
+
+
+def finish_request_db_tracking(token, route: str):
+    queries, seconds = _request_db.get()
+    _request_db.reset(token)
+    REQUEST_DB_QUERIES.labels(route).observe(queries)
+    REQUEST_DB_SECONDS.labels(route).observe(seconds)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    counters = _request_db.get()
+    if counters is not None:
+        counters[0] += 1
+        counters[1] += elapsed
+
+
+def observe_redis(command, seconds: float):
+    name = command.decode() if isinstance(command, bytes) else str(command)
+    REDIS_COMMANDS.labels(name.upper()).observe(seconds)
+
+
+class TimedTemplate(jinja2.Template):
+    """ Шаблон Jinja2, що вимірює час рендерингу """
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            TEMPLATE_RENDER.labels(self.name).observe(time.perf_counter() - start)
+
+    async def generate_async(self, *args, **kwargs):
+        # Потокові сторінки: час до вичерпання генератора (разом з очікуванням рядків)
+        start = time.perf_counter()
+        try:
+            async for chunk in super().generate_async(*args, **kwargs):
+                yield chunk
+        finally:
+            TEMPLATE_RENDER.labels(self.name).observe(time.perf_counter() - start)
+
+
+class RuntimeStatsCollector:
+    """ Знімки стану пулів і кешів на момент запиту /metrics """
+
+    def describe(self):
+        # Без опису реєстр не викликає collect() під час імпорту
+        return []
+
+    def collect(self):
+        from cache.contact_cache import get_cache_stats as get_contact_cache_stats
+        from cache.user_cache import get_cache_stats
+        from database import get_pool_stats
+        from services.auth import get_hash_pool_stats
+        from services.mailer import get_mailer
+        from templating import get_fragment_cache_stats
+
+        pool = GaugeMetricFamily("db_pool", "DB connection pool state", labels=["stat"])
+        for name, value in get_pool_stats().items():
+            pool.add_metric([name], value)
+        yield pool
+
+        user_cache = GaugeMetricFamily(
+            "user_cache_events", "User cache hits/misses/errors", labels=["event"]
+        )
+        for name, value in get_cache_stats().items():
+            user_cache.add_metric([name], value)
+        yield user_cache
+
+        contact_cache = GaugeMetricFamily(
+            "contact_cache_events",
+            "Contact list cache L1/L2 hits, misses and coalesced loads",
+            labels=["event"],
+        )
+        for name, value in get_contact_cache_stats().items():
+            contact_cache.add_metric([name], value)
+        yield contact_cache
+
+        fragments = GaugeMetricFamily(
+            "template_fragment_cache_events",
+            "Template {% cache %} fragment hits/misses and size",
+            labels=["event"],
+        )
+        for name, value in get_fragment_cache_stats().items():
+            fragments.add_metric([name], value)
+        yield fragments
+
+        hashing = GaugeMetricFamily(
+            "password_hash_pool", "bcrypt worker pool state", labels=["stat"]
+        )
+        for name, value in get_hash_pool_stats().items():
+            hashing.add_metric([name], value)
+        yield hashing
+
+        mailer = get_mailer()
+        mail = GaugeMetricFamily("mail_queue", "Outgoing mail queue", labels=["stat"])
+        mail.add_metric(["queued"], mailer.queued)
+        for name, value in mailer.stats.items():
+            mail.add_metric([name], value)
+        yield mail
+
+
+REGISTRY.register(RuntimeStatsCollector())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """ Тіло та content-type для /metrics """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import logging
+import secrets
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+
+from cache.contact_cache import store_upcoming_birthdays
+from cache.contacts_version import get_contacts_versions
+from cache.redis_client import get_redis_client, redis_errors
+from config import get_settings
+from database import get_session
+import crud
+
+logger = logging.getLogger(__name__)
+
+# Як часто планувальник перевіряє, чи є необроблені шарди
+POLL_INTERVAL = 600
+
+# Шард, який обробляє воркер, блокується на цей час (потім його підбере інший)
+SHARD_LOCK_SECONDS = 600
+
+# Результати й позначки "готово" живуть трохи довше доби
+RESULT_TTL = 26 * 3600
+
+# Зняття блокування лише його власником: після SHARD_LOCK_SECONDS шард
+# міг захопити інший воркер, і його блокування видаляти не можна
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _shard_keys(day: date, start_id: int) -> tuple[str, str]:
+    prefix = f"birthday_digest:{day.isoformat()}:{start_id}"
+    return f"{prefix}:lock", f"{prefix}:done"
+
+
+async def process_shard(start_id: int, end_id: int, day: date) -> int:
+    """
+
+    Обчислення днів народження для користувачів з ID у ``[start_id, end_id)``.
+
+    Один SQL-запит на шард; результат кожного користувача записується в
+    кеш сторінки днів народження, а за ``BIRTHDAY_DIGEST_EMAILS`` — ще й
+    ставиться в чергу лист-дайджест.
+
+    :return: Кількість оброблених користувачів
+
+    """
+    from services.email import send_birthday_digest
+
+    settings = get_settings()
+    days = settings.BIRTHDAY_DIGEST_DAYS
+    async with get_session()() as db:
+        # Покоління беремо до запиту (як contact_cache.get_or_load): зміна
+        # контактів під час обчислення збільшить покоління, і запис під
+        # старим просто не буде прочитано
+        owner_ids = await crud.get_user_ids_in_range(db, start_id, end_id)
+        versions = await get_contacts_versions(owner_ids)
+        rows = await crud.upcoming_birthdays_by_owner(db, start_id, end_id, day, days)
+
+    users = [
+        (owner_id, email, [contact for _, _, contact in group if contact is not None])
+        for (owner_id, email), group in groupby(rows, key=lambda row: row[:2])
+    ]
+
+    for owner_id, email, contacts in users:
+        generation = versions.get(owner_id)
+        if generation is not None:
+            await store_upcoming_birthdays(
+                owner_id, generation, contacts, days, day, RESULT_TTL
+            )
+        if contacts and settings.BIRTHDAY_DIGEST_EMAILS:
+            await send_birthday_digest(email, contacts)
+    return len(users)
+
+
+async def run_birthday_digest(day: date | None = None) -> int:
+    """
+
+    Денний прогін по всіх шардах користувачів.
+
+    Кожен діапазон ID захоплюється Redis-блокуванням, тож кілька воркерів
+    (або процесів застосунку) ділять шарди між собою, а оброблений шард
+    позначається готовим і за цей день більше не обчислюється.
+
+    :return: Кількість шардів, оброблених цим процесом
+
+    """
+    day = day or date.today()
+    shard_size = get_settings().BIRTHDAY_SHARD_SIZE
+    async with get_session()() as db:
+        min_id, max_id = await crud.get_user_id_range(db)
+    if min_id is None:
+        return 0
+
+    redis = get_redis_client()
+    processed = 0
+    for start_id in range(min_id, max_id + 1, shard_size):
+        lock_key, done_key = _shard_keys(day, start_id)
+        if await redis.exists(done_key):
+            continue
+        token = secrets.token_hex(16)
+        if not await redis.set(lock_key, token, nx=True, ex=SHARD_LOCK_SECONDS):
+            continue
+        try:
+            users = await process_shard(start_id, start_id + shard_size, day)
+            await redis.set(done_key, users, ex=RESULT_TTL)
+            processed += 1
+        finally:
+            await redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+    logger.info("Birthday digest for %s: %d shards processed", day, processed)
+    return processed
+
+
+def _is_due(now: datetime) -> bool:
+    return now.hour >= get_settings().BIRTHDAY_DIGEST_HOUR
+
+
+async def scheduler_loop():
+    """Періодично запускає денний прогін після BIRTHDAY_DIGEST_HOUR"""
+    while True:
+        try:
+            if _is_due(datetime.now()):
+                await run_birthday_digest()
+        except redis_errors() as e:
+            logger.warning("Birthday digest skipped: %s", e)
+        except Exception:
+            logger.exception("Birthday digest failed")
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+_task: asyncio.Task | None = None
+
+
+def start_scheduler():
+    """Запуск планувальника у процесі застосунку (SCHEDULER_ENABLED)"""
+    global _task
+    if get_settings().SCHEDULER_ENABLED and _task is None:
+        _task = asyncio.get_running_loop().create_task(
+            scheduler_loop(), name="birthday-digest"
+        )
+
+
+async def stop_scheduler():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+
+
+async def _main(once: bool, day: date | None):
+    from services.mailer import stop_mailer
+
+    try:
+        if once:
+            await run_birthday_digest(day)
+        else:
+            await scheduler_loop()
+    finally:
+        # Дочекатися відправки листів з черги
+        await stop_mailer()
+
+
+if __name__ == "__main__":
+    # Окремий воркер: python -m services.scheduler [--once] [--date YYYY-MM-DD]
+    parser = argparse.ArgumentParser(description="Birthday digest worker")
+    parser.add_argument("--once", action="store_true", help="один прогін і вихід")
+    parser.add_argument("--date", type=date.fromisoformat, help="день прогону")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.once, args.date))
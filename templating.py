@@ -0,0 +1,176 @@
+import time
+from collections import OrderedDict
+
+import jinja2
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from config import get_settings
+from services.metrics import TimedTemplate
+
+TEMPLATES_DIR = "templates"
+
+# Фрагменти {% cache %}: ключ -> (HTML, до якого моменту дійсний)
+_fragments: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+_fragment_stats = {"hits": 0, "misses": 0}
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Тег ``{% cache key %}...{% endcache %}``: кешування відрендереного блоку
+    в пам'яті воркера на CONTACT_CACHE_TTL секунд.
+
+    Ключ має містити все, від чого залежить блок (власник, покоління
+    контактів, параметри сторінки); ``none`` — рендер без кешу.
+
+    """
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_cached_fragment", [key]), [], [], body
+        ).set_lineno(lineno)
+
+    def _cached_fragment(self, key, caller):
+        if key is None or isinstance(key, jinja2.Undefined):
+            return caller()
+        cached = _fragments.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            _fragment_stats["hits"] += 1
+            _fragments.move_to_end(key)
+            return cached[0]
+
+        _fragment_stats["misses"] += 1
+        if self.environment.is_async:
+            # В async-середовищі caller() — корутина
+            return self._store_async(key, caller())
+        return self._store(key, caller())
+
+    async def _store_async(self, key, pending):
+        return self._store(key, await pending)
+
+    @staticmethod
+    def _store(key, html):
+        settings = get_settings()
+        _fragments[key] = (html, time.monotonic() + settings.CONTACT_CACHE_TTL)
+        _fragments.move_to_end(key)
+        while len(_fragments) > settings.FRAGMENT_CACHE_SIZE:
+            _fragments.popitem(last=False)
+        return html
+
+
+def create_environment(enable_async: bool = False) -> jinja2.Environment:
+    """
+    Спільне середовище Jinja2 для всіх роутерів.
+
+    Кеш байткоду і перевірка змін файлів налаштовуються під час старту
+    застосунку (``configure_environment``), а не під час імпорту.
+
+    :param enable_async: Середовище для потокового рендерингу (generate_async)
+
+    """
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        extensions=[FragmentCacheExtension],
+        enable_async=enable_async,
+    )
+    # 📊 вимірювання часу рендерингу
+    env.template_class = TimedTemplate
+    env.globals["flush"] = FLUSH
+    return env
+
+
+def configure_environment(env: jinja2.Environment) -> None:
+    """
+    Налаштування середовища Jinja2 з конфігурації.
+
+    Скомпільовані шаблони зберігаються на диску (FileSystemBytecodeCache),
+    тож новий воркер не компілює їх заново; у production зміни файлів
+    шаблонів не перевіряються на кожен рендер.
+
+    :param env: Середовище з ``create_environment``
+
+    """
+    settings = get_settings()
+    # Код async-шаблонів інший, тож і файли байткоду окремі
+    pattern = "__jinja2_async_%s.cache" if env.is_async else "__jinja2_%s.cache"
+    env.auto_reload = settings.ENV != "production"
+    env.bytecode_cache = jinja2.FileSystemBytecodeCache(
+        settings.TEMPLATE_BYTECODE_DIR or None, pattern
+    )
+
+
+# {{ flush }} у шаблоні — віддати вже відрендерене клієнту, не чекаючи буфер
+FLUSH = Markup("<!-- flush -->")
+
+# Розмір буфера потокової відповіді (менші шматки Jinja склеюються)
+STREAM_CHUNK_SIZE = 16 * 1024
+
+templates = Jinja2Templates(env=create_environment())
+stream_templates = Jinja2Templates(env=create_environment(enable_async=True))
+
+
+async def _render_chunks(template: jinja2.Template, context: dict):
+    buffer, size = [], 0
+    async for chunk in template.generate_async(context):
+        if chunk == FLUSH:
+            if buffer:
+                yield "".join(buffer).encode()
+                buffer, size = [], 0
+            continue
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def stream_template(
+    name: str, context: dict, status_code: int = 200
+) -> StreamingResponse:
+    """
+
+    Потоковий рендер шаблону: HTML віддається частинами по мірі генерації.
+
+    Рядки таблиці можна передати асинхронним ітератором (напр. з
+    ``stream_scalars``) — у пам'яті лише поточний буфер, а заголовок
+    сторінки клієнт отримує одразу (``{{ flush }}`` перед циклом).
+
+    :param name: Назва шаблону
+    :param context: Контекст шаблону (з ``request``)
+    :param status_code: HTTP статус відповіді
+    :return: StreamingResponse з text/html
+
+    """
+    template = stream_templates.get_template(name)
+    return StreamingResponse(
+        _render_chunks(template, context),
+        status_code=status_code,
+        media_type="text/html",
+    )
+
+
+def precompile_templates() -> int:
+    """Налаштування і компіляція всіх HTML-шаблонів під час старту застосунку"""
+    configure_environment(templates.env)
+    configure_environment(stream_templates.env)
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+        stream_templates.env.get_template(name)
+    return len(names)
+
+
+def get_fragment_cache_stats() -> dict:
+    """Лічильники влучань/промахів кешу фрагментів шаблонів"""
+    return dict(_fragment_stats, size=len(_fragments))
@@ -1,6 +1,11 @@
 import os, sys, asyncio
 import pytest
 import pytest_asyncio
+
+# Таблиці тестів створює prepare_database, а не міграції
+os.environ["SCHEMA_CHECK"] = "false"
+# Планувальник днів народження не запускається з lifespan застосунку
+os.environ["SCHEDULER_ENABLED"] = "false"
 from .test_token import generate_test_token
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
@@ -11,7 +16,8 @@ from httpx import AsyncClient, ASGITransport
 from asgi_lifespan import LifespanManager
 from models import User
 from services.email import send_verification_email
-from services.auth import get_password_hash,create_access_token
+from services.auth import get_password_hash,create_access_token, user_token_claims
+from sqlalchemy import select
 from unittest.mock import AsyncMock, patch
 
 os.environ["SMTP_USER"] = "test@example.com"
@@ -109,9 +115,6 @@ async def client(db, fresh_loop):
 
     app.dependency_overrides[get_db] = override_get_db
     
-    app.router.on_startup.clear()
-    app.router.on_shutdown.clear()
-    
     transport = ASGITransport(app=app)
     
     with patch("cache.redis_client", new=AsyncMock()), \
@@ -141,6 +144,12 @@ async def token(db):
 async def user_token(token):
     return token
 
+@pytest_asyncio.fixture
+async def id_token(db, token):
+    """Access-токен як після /login: ID користувача в sub та claims (роль, tv)"""
+    user = await db.scalar(select(User).where(User.email == "test@example.com"))
+    return create_access_token(user.id, **user_token_claims(user))
+
 @pytest_asyncio.fixture
 async def admin_token(db):
     user = User(email="admin@example.com", is_superuser=True, hashed_password="fake")
@@ -0,0 +1,65 @@
+import asyncio
+from email import message_from_bytes
+
+
+class SMTPStub:
+    """
+    Мінімальний локальний SMTP-сервер для тестів.
+
+    Приймає листи по SMTP (HELO/EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+    і зберігає їх у ``messages``. ``fail_next`` — кількість наступних
+    DATA-команд, на які сервер відповість тимчасовою помилкою 451.
+
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages = []
+        self.connections = 0
+        self.fail_next = 0
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 smtp-stub ESMTP")
+        try:
+            while line := await reader.readline():
+                command = line.decode().strip().upper()
+                if command.startswith(("EHLO", "HELO")):
+                    await reply("250 smtp-stub")
+                elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = await reader.readuntil(b"\r\n.\r\n")
+                    body = data[: -len(b".\r\n")].replace(b"\r\n..", b"\r\n.")
+                    if self.fail_next:
+                        self.fail_next -= 1
+                        await reply("451 Try again later")
+                    else:
+                        self.messages.append(message_from_bytes(body))
+                        await reply("250 Queued")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,113 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from models import User
+from services.auth import create_access_token, user_token_claims
+
+
+@pytest.fixture
+def contacts_version():
+    version = AsyncMock(return_value="100")
+    with patch("routers.api.get_contacts_version", version), patch(
+        "crud.bump_contacts_version", AsyncMock()
+    ):
+        yield version
+
+
+async def _auth_headers(db):
+    user = User(email="api@example.com", hashed_password="x", is_verified=True)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token(subject=user.id, **user_token_claims(user))
+    return {"Authorization": f"Bearer {token}"}
+
+
+CONTACT = {
+    "first_name": "Api",
+    "last_name": "Client",
+    "email": "api.client@example.com",
+    "phone": "123456",
+    "date_of_birth": "1990-06-15",
+}
+
+
+@pytest.mark.asyncio
+async def test_api_requires_bearer_token(client):
+    response = await client.get("/api/v1/contacts")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_api_crud_and_field_selection(client, db, contacts_version):
+    headers = await _auth_headers(db)
+
+    response = await client.post("/api/v1/contacts", json=CONTACT, headers=headers)
+    assert response.status_code == 201
+    contact_id = response.json()["id"]
+
+    response = await client.get(
+        f"/api/v1/contacts/{contact_id}?fields=id,email", headers=headers
+    )
+    assert response.json() == {"id": contact_id, "email": CONTACT["email"]}
+
+    response = await client.patch(
+        f"/api/v1/contacts/{contact_id}", json={"phone": "999999"}, headers=headers
+    )
+    assert response.json()["phone"] == "999999"
+
+    response = await client.get("/api/v1/contacts?fields=unknown", headers=headers)
+    assert response.status_code == 400
+
+    response = await client.delete(f"/api/v1/contacts/{contact_id}", headers=headers)
+    assert response.status_code == 204
+    response = await client.get(f"/api/v1/contacts/{contact_id}", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_etag_answers_304_without_querying_contacts(
+    client, db, contacts_version
+):
+    headers = await _auth_headers(db)
+    response = await client.get("/api/v1/contacts", headers=headers)
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"100-')
+
+    with patch("crud.list_contacts_page", AsyncMock()) as list_page:
+        response = await client.get(
+            "/api/v1/contacts", headers={**headers, "If-None-Match": etag}
+        )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    list_page.assert_not_called()
+
+    # Нова версія контактів — новий ETag
+    contacts_version.return_value = "101"
+    response = await client.get(
+        "/api/v1/contacts", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_patch_rejects_null_and_reports_duplicate_email(
+    client, db, contacts_version
+):
+    headers = await _auth_headers(db)
+    first = (await client.post("/api/v1/contacts", json=CONTACT, headers=headers)).json()
+    other = dict(CONTACT, email="other@example.com")
+    second = (await client.post("/api/v1/contacts", json=other, headers=headers)).json()
+
+    response = await client.patch(
+        f"/api/v1/contacts/{first['id']}", json={"phone": None}, headers=headers
+    )
+    assert response.status_code == 422
+
+    response = await client.patch(
+        f"/api/v1/contacts/{second['id']}",
+        json={"email": CONTACT["email"]},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Contact with this email already exists."
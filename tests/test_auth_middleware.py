@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from middleware.auth import compile_public_paths
+from sqlalchemy import select
+from models import User
+from services.auth import create_access_token, user_token_claims
+
+
+def test_public_paths_match_whole_segments():
+    public = compile_public_paths()
+
+    for path in ("/", "/login", "/login/", "/static/css/app.css", "/api/v1/contacts"):
+        assert public.match(path), path
+    for path in ("/contacts", "/loginx", "/statics", "/users/me"):
+        assert not public.match(path), path
+
+
+@pytest.mark.asyncio
+async def test_protected_page_redirects_without_cookies(client):
+    response = await client.get("/contacts", follow_redirects=False)
+    assert response.status_code == 303
+    assert response.headers["location"] == "/login"
+
+
+@pytest.mark.asyncio
+async def test_protected_page_accepts_access_cookie(client, id_token):
+    response = await client.get(
+        "/contacts/", cookies={"access_token": id_token}, follow_redirects=False
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_unverified_user_is_sent_to_verify_info_with_email(client, db):
+    user = User(email="new+tag@example.com", hashed_password="x", is_verified=False)
+    db.add(user)
+    await db.commit()
+    token = create_access_token(user.id, **user_token_claims(user))
+
+    with patch("middleware.auth.get_or_load_user", AsyncMock(return_value=user)):
+        response = await client.get(
+            "/contacts/", cookies={"access_token": token}, follow_redirects=False
+        )
+
+    assert response.status_code == 303
+    assert response.headers["location"] == "/verify-info?email=new%2Btag%40example.com"
+
+
+@pytest.mark.asyncio
+async def test_revoked_or_unversioned_token_redirects_to_login(client, db, token):
+    user = await db.scalar(select(User).where(User.email == "test@example.com"))
+    claims = user_token_claims(user)
+    revoked = create_access_token(user.id, **dict(claims, tv=claims["tv"] + 1))
+    unversioned = create_access_token(
+        user.id, **{k: v for k, v in claims.items() if k != "tv"}
+    )
+
+    for access_token in (revoked, unversioned):
+        response = await client.get(
+            "/contacts/", cookies={"access_token": access_token}, follow_redirects=False
+        )
+        # HTML-сторінка: редирект на вхід, а не JSON 401 із залежності
+        assert response.status_code == 303
+        assert response.headers["location"] == "/login"
@@ -0,0 +1,63 @@
+import hashlib
+import io
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+from services import avatars
+
+
+def _png(width=400, height=300) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_render_thumbnails_crops_to_square_sizes():
+    thumbnails = avatars.render_thumbnails(_png(), (128, 32))
+
+    for size, data in thumbnails.items():
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == "JPEG"
+            assert image.size == (size, size)
+
+
+def test_render_thumbnails_rejects_non_images():
+    with pytest.raises(ValueError):
+        avatars.render_thumbnails(b"not an image")
+
+
+def test_render_avatar_file_reads_and_hashes_path(tmp_path):
+    path = tmp_path / "upload"
+    path.write_bytes(_png())
+
+    digest, thumbnails = avatars.render_avatar_file(str(path), (32,))
+
+    assert digest == hashlib.sha256(_png()).hexdigest()[:16]
+    assert set(thumbnails) == {32}
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_enforces_size_limit():
+    upload = UploadFile(io.BytesIO(b"x" * 1000), filename="a.png")
+    with pytest.raises(HTTPException) as exc:
+        await avatars.spool_upload(upload, max_bytes=999)
+    assert exc.value.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_store_avatar_writes_content_hashed_files(tmp_path, monkeypatch):
+    storage = avatars.LocalAvatarStorage(str(tmp_path), "/static/avatars")
+    monkeypatch.setattr(avatars, "_storage", storage)
+
+    first = await avatars.store_avatar(7, UploadFile(io.BytesIO(_png()), filename="a.png"))
+    again = await avatars.store_avatar(7, UploadFile(io.BytesIO(_png()), filename="a.png"))
+    other = await avatars.store_avatar(
+        7, UploadFile(io.BytesIO(_png(50, 50)), filename="b.png")
+    )
+
+    assert set(first) == set(avatars.AVATAR_SIZES)
+    assert first == again
+    assert first[256] != other[256]
+    assert first[256].startswith("/static/avatars/user_7/")
+    name = first[256].removeprefix("/static/avatars/")
+    assert (tmp_path / name).is_file()
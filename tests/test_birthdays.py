@@ -1,4 +1,8 @@
 import pytest
+from datetime import date
+from sqlalchemy import select
+import crud
+from models import Contact, User
 
 
 @pytest.mark.asyncio
@@ -8,3 +12,44 @@ async def test_upcoming_birthdays(client, token):
 
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+
+async def _contacts_in_window(db, today, days, birthdays):
+    user = User(email="bday@example.com", hashed_password="x", is_verified=True)
+    db.add(user)
+    await db.commit()
+    for i, dob in enumerate(birthdays):
+        db.add(
+            Contact(
+                first_name=f"First{i}",
+                last_name=f"Last{i}",
+                email=f"bday{i}@example.com",
+                phone="123456",
+                date_of_birth=dob,
+                owner_id=user.id,
+            )
+        )
+    await db.commit()
+
+    condition, order = crud._birthday_window(today, days)
+    result = await db.execute(select(Contact).where(condition).order_by(*order))
+    return [c.date_of_birth for c in result.scalars().all()]
+
+
+@pytest.mark.asyncio
+async def test_birthday_window_wraps_year_end(db):
+    found = await _contacts_in_window(
+        db,
+        date(2025, 12, 29),
+        7,
+        [date(1990, 12, 30), date(1991, 1, 2), date(1970, 1, 10)],
+    )
+    assert found == [date(1990, 12, 30), date(1991, 1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_feb_29_birthday_in_non_leap_year(db):
+    found = await _contacts_in_window(
+        db, date(2025, 2, 28), 0, [date(1992, 2, 29), date(1985, 3, 1)]
+    )
+    assert found == [date(1992, 2, 29)]
@@ -0,0 +1,96 @@
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import select, func
+import crud
+from models import Contact, User
+from schemas import ContactBulkUpdate, ContactSelection, ContactUpdate
+
+
+async def _seed(db, count: int):
+    owner = User(email="bulk@example.com", hashed_password="x")
+    other = User(email="bulk-other@example.com", hashed_password="x")
+    db.add_all([owner, other])
+    await db.commit()
+    db.add_all(
+        Contact(
+            first_name="Stale" if i % 2 else "Keep",
+            last_name=f"Bulk{i}",
+            email=f"bulk{i}@example.com",
+            phone="123456",
+            date_of_birth=date(1990, 1, 1),
+            owner_id=owner.id if i < count else other.id,
+        )
+        for i in range(count + 2)
+    )
+    await db.commit()
+    ids = (await db.execute(select(Contact.id).order_by(Contact.id))).scalars().all()
+    return owner, ids
+
+
+@pytest.fixture(autouse=True)
+def no_version_bump():
+    with patch("crud.bump_contacts_version", AsyncMock()):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_by_ids_is_chunked_and_owner_scoped(db):
+    owner, ids = await _seed(db, 10)
+
+    with patch.object(crud, "BULK_CHUNK_SIZE", 3):
+        deleted = await crud.bulk_delete_contacts(
+            db, owner.id, ContactSelection(ids=ids)
+        )
+
+    # Два контакти іншого користувача залишились
+    assert deleted == 10
+    assert await db.scalar(select(func.count()).select_from(Contact)) == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_filter_returns_ids(db):
+    owner, _ = await _seed(db, 10)
+
+    updated = await crud.bulk_update_contacts(
+        db,
+        owner.id,
+        ContactSelection(first_name="stale"),
+        ContactUpdate(date_of_birth=date(2000, 2, 29), information="old"),
+    )
+
+    assert len(updated) == 5
+    rows = (
+        await db.execute(
+            select(Contact.birthday_md, Contact.information).where(
+                Contact.id.in_(updated)
+            )
+        )
+    ).all()
+    assert set(rows) == {(229, "old")}
+
+
+def test_bulk_requests_are_validated():
+    with pytest.raises(ValidationError):
+        ContactSelection()
+    with pytest.raises(ValidationError):
+        ContactBulkUpdate(ids=[1], values={"email": "new@example.com"})
+    for field in ("first_name", "last_name", "phone", "date_of_birth"):
+        with pytest.raises(ValidationError):
+            ContactBulkUpdate(ids=[1], values={field: None})
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_integrity_error_is_400(db):
+    owner, ids = await _seed(db, 2)
+
+    # Обхід валідації схеми: NOT NULL порушується вже в БД
+    values = ContactUpdate.model_construct(phone=None, _fields_set={"phone"})
+    with pytest.raises(HTTPException) as exc:
+        await crud.bulk_update_contacts(db, owner.id, ContactSelection(ids=ids), values)
+
+    assert exc.value.status_code == 400
+    phones = (await db.execute(select(Contact.phone))).scalars().all()
+    assert set(phones) == {"123456"}
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, patch
+from cache import contact_cache
+from models import Contact, User
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def get(self, key):
+        return self.data.get(key)
+
+
+@pytest.fixture
+def generation():
+    version = AsyncMock(return_value="1")
+    with patch.object(contact_cache, "get_contacts_version", version), patch.object(
+        contact_cache, "get_redis_client", return_value=FakeRedis()
+    ):
+        contact_cache._local.clear()
+        yield version
+
+
+@pytest.mark.asyncio
+async def test_list_is_served_from_cache_until_generation_changes(db, generation):
+    user = User(email="cache@example.com", hashed_password="x")
+    db.add(user)
+    await db.commit()
+    db.add(
+        Contact(
+            first_name="Ann",
+            last_name="Lee",
+            email="ann.cache@example.com",
+            phone="123456",
+            date_of_birth=date(1990, 1, 1),
+            owner_id=user.id,
+        )
+    )
+    await db.commit()
+
+    original = contact_cache.crud.list_contacts_page
+    with patch("crud.list_contacts_page", wraps=original) as query:
+        first, _, _ = await contact_cache.list_contacts_page(db, user.id)
+        again, _, _ = await contact_cache.list_contacts_page(db, user.id)
+        assert query.call_count == 1
+        assert again is first
+        assert first[0].email == "ann.cache@example.com"
+
+        # L1 порожній (інший воркер) — дані з Redis без запиту до БД
+        contact_cache._local.clear()
+        await contact_cache.list_contacts_page(db, user.id)
+        assert query.call_count == 1
+
+        generation.return_value = "2"
+        await contact_cache.list_contacts_page(db, user.id)
+        assert query.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(generation):
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["result"]
+
+    results = await asyncio.gather(
+        *(contact_cache.get_or_load(1, "test", {}, loader, list) for _ in range(5))
+    )
+    assert calls == [1]
+    assert all(r == ["result"] for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bypassed_without_generation(generation):
+    generation.return_value = None
+    loader = AsyncMock(return_value=[])
+    await contact_cache.get_or_load(1, "test", {}, loader, list)
+    await contact_cache.get_or_load(1, "test", {}, loader, list)
+    assert loader.await_count == 2
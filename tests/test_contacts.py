@@ -1,8 +1,10 @@
 import pytest
+from datetime import date
+from unittest.mock import AsyncMock, patch
 from fastapi import status
 from httpx import AsyncClient
 from sqlalchemy import select
-import models, crud
+import models, crud, schemas
 
 @pytest.mark.asyncio
 async def test_create_contact(client, token, db, fresh_loop):
@@ -27,4 +29,54 @@ async def test_create_contact(client, token, db, fresh_loop):
     assert contact.last_name == "Smith"
     assert contact.phone == "123456789"
     assert str(contact.date_of_birth) == "1990-01-01"
-    assert contact.information == "friend"
\ No newline at end of file
+    assert contact.information == "friend"
+
+@pytest.mark.asyncio
+async def test_update_and_delete_are_scoped_to_owner(db):
+    owner = models.User(email="owner@example.com", hashed_password="x")
+    intruder = models.User(email="intruder@example.com", hashed_password="x")
+    db.add_all([owner, intruder])
+    await db.commit()
+    contact = models.Contact(
+        first_name="Own",
+        last_name="Er",
+        email="owned@example.com",
+        phone="123456",
+        date_of_birth=date(1990, 1, 1),
+        owner_id=owner.id,
+    )
+    db.add(contact)
+    await db.commit()
+
+    with patch("crud.bump_contacts_version", AsyncMock()):
+        change = schemas.ContactUpdate(phone="000000", date_of_birth=date(1992, 2, 29))
+        assert await crud.update_contact(db, contact.id, change, intruder.id) is None
+        assert not await crud.delete_contact(db, contact.id, intruder.id)
+
+        updated = await crud.update_contact(db, contact.id, change, owner.id)
+        assert (updated.phone, updated.birthday_md) == ("000000", 229)
+        assert await crud.delete_contact(db, contact.id, owner.id)
+
+
+@pytest.mark.asyncio
+async def test_search_treats_like_wildcards_literally(db):
+    user = models.User(email="search@example.com", hashed_password="x")
+    db.add(user)
+    await db.commit()
+    for first_name in ("100%", "a_b", "plain"):
+        db.add(models.Contact(
+            first_name=first_name,
+            last_name="Search",
+            email=f"{first_name}@example.com",
+            phone="123456",
+            date_of_birth=date(1990, 1, 1),
+            owner_id=user.id,
+        ))
+    await db.commit()
+
+    async def names(query):
+        return {c.first_name for c in await crud.search_contacts(db, query, user.id)}
+
+    assert await names("%") == {"100%"}
+    assert await names("_") == {"a_b"}
+    assert await names("A_B") == {"a_b"}
@@ -0,0 +1,79 @@
+import gzip
+import io
+import json
+import pytest
+from datetime import date
+import crud
+from models import Contact, User
+from services import contact_io
+
+
+async def _seed(db, count: int):
+    user = User(email="export@example.com", hashed_password="x")
+    db.add(user)
+    await db.commit()
+    db.add_all(
+        Contact(
+            first_name=f"Name{i}",
+            last_name="Export; Test",
+            email=f"export{i}@example.com",
+            phone="123456",
+            date_of_birth=date(1990, 5, 1),
+            information="line1\nline2, more" if i == 0 else None,
+            owner_id=user.id,
+        )
+        for i in range(count)
+    )
+    await db.commit()
+    return user
+
+
+async def _export(db, user, file_format, compress=False, **filters):
+    batches = crud.stream_contacts(db, user.id, batch_size=4, **filters)
+    data = b"".join(
+        [chunk async for chunk in contact_io.export_stream(batches, file_format, compress)]
+    )
+    return gzip.decompress(data) if compress else data
+
+
+@pytest.mark.asyncio
+async def test_stream_contacts_yields_batches(db):
+    user = await _seed(db, 10)
+
+    sizes = [len(rows) async for rows in crud.stream_contacts(db, user.id, batch_size=4)]
+    assert sizes == [4, 4, 2]
+
+    filtered = [
+        row.email
+        async for rows in crud.stream_contacts(db, user.id, email="export1")
+        for row in rows
+    ]
+    assert filtered == ["export1@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_export_formats(db):
+    user = await _seed(db, 10)
+
+    csv_text = (await _export(db, user, "csv", compress=True)).decode()
+    assert csv_text.startswith("id,first_name,last_name,email")
+    assert csv_text.count("export") == 10
+
+    lines = (await _export(db, user, "ndjson")).decode().splitlines()
+    assert len(lines) == 10
+    assert json.loads(lines[0])["information"] == "line1\nline2, more"
+
+    # Експортований vCard читається імпортом без втрат
+    vcf = await _export(db, user, "vcf")
+    cards = list(contact_io.iter_vcard_rows(io.BytesIO(vcf)))
+    assert len(cards) == 10
+    assert cards[0]["email"] == "export0@example.com"
+    assert cards[0]["date_of_birth"] == "1990-05-01"
+
+
+@pytest.mark.asyncio
+async def test_empty_csv_export_has_header(db):
+    user = await _seed(db, 0)
+    assert (await _export(db, user, "csv")).decode().strip() == (
+        "id,first_name,last_name,email,phone,date_of_birth,information"
+    )
@@ -0,0 +1,117 @@
+import io
+import pytest
+from datetime import date
+from sqlalchemy import select
+import crud
+from models import Contact, User
+from schemas import ContactImport
+from services import contact_io
+
+CSV = b"""\xef\xbb\xbfFirst_Name,last_name,email,phone,birthday,notes
+Ann,Lee,ann@example.com,123456,1990-02-03,"multi
+line"
+Bob,Ray,not-an-email,123456,1991-01-01,
+Ann,Lee,ann@example.com,123456,1990-02-03,
+"""
+
+VCF = b"""BEGIN:VCARD\r
+VERSION:3.0\r
+N:Doe;John;;;\r
+EMAIL;TYPE=INTERNET:john@\r
+ example.org\r
+TEL:+380501112233\r
+BDAY:19850412\r
+NOTE:hello\\, world\r
+END:VCARD\r
+"""
+
+
+def test_csv_rows_are_streamed_and_validated():
+    chunks = list(contact_io.iter_chunks(contact_io.iter_csv_rows(io.BytesIO(CSV))))
+    contacts, errors = contact_io.validate_rows(chunks[0])
+
+    assert [(n, c.email) for n, c in contacts] == [(1, "ann@example.com")]
+    assert contacts[0][1].information == "multi\nline"
+    assert [e["row"] for e in errors] == [2, 3]
+    assert errors[1]["errors"] == ["email: duplicate in file"]
+
+
+def test_vcard_rows():
+    (card,) = contact_io.iter_vcard_rows(io.BytesIO(VCF))
+    contact = ContactImport(**card)
+
+    assert (contact.first_name, contact.last_name) == ("John", "Doe")
+    assert contact.email == "john@example.org"
+    assert contact.date_of_birth == date(1985, 4, 12)
+    assert contact.information == "hello, world"
+
+
+@pytest.mark.asyncio
+async def test_import_skips_or_updates_existing_emails(db):
+    owner = User(email="owner@example.com", hashed_password="x")
+    other = User(email="other@example.com", hashed_password="x")
+    db.add_all([owner, other])
+    await db.commit()
+
+    rows = [
+        ContactImport(
+            first_name=f"Name{i}",
+            last_name="Import",
+            email=f"imp{i}@example.com",
+            phone="123456",
+            date_of_birth=date(1990, 3, 1),
+        )
+        for i in range(3)
+    ]
+    assert len(await crud.import_contacts(db, rows, owner.id)) == 3
+    assert await crud.import_contacts(db, rows, owner.id) == set()
+
+    rows[0].phone = "999999"
+    assert await crud.import_contacts(db, rows[:1], owner.id, overwrite=True) == {
+        "imp0@example.com"
+    }
+    # Контакт іншого користувача не перезаписується
+    assert await crud.import_contacts(db, rows[:1], other.id, overwrite=True) == set()
+
+    result = await db.execute(
+        select(Contact).where(Contact.email == "imp0@example.com")
+    )
+    contact = result.scalar_one()
+    await db.refresh(contact)
+    assert (contact.owner_id, contact.phone, contact.birthday_md) == (
+        owner.id,
+        "999999",
+        301,
+    )
+
+
+def test_import_email_is_validated_with_public_api():
+    row = dict(first_name="A", last_name="B", phone="123456", date_of_birth="1990-01-01")
+    assert ContactImport(email="ok+tag@Example.ORG", **row).email == "ok+tag@example.org"
+    with pytest.raises(ValueError):
+        ContactImport(email="bad..dots@example.org", **row)
+
+
+@pytest.mark.asyncio
+async def test_non_utf8_csv_is_rejected(client, id_token):
+    data = "first_name,last_name\nZoë,Brontë\n".encode("latin-1")
+    response = await client.post(
+        "/contacts/import",
+        files={"file": ("contacts.csv", data, "text/csv")},
+        cookies={"access_token": id_token},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "File must be UTF-8 encoded CSV"
+
+
+def test_too_long_email_is_a_row_error():
+    email = "a" * 190 + "@example.org"  # 202 символи: довше за contacts.email
+    row = dict(
+        first_name="A", last_name="B", email=email, phone="1234", date_of_birth="1990-01-01"
+    )
+    contacts, errors = contact_io.validate_rows([(1, row)])
+
+    assert contacts == []
+    assert errors[0]["row"] == 1
+    assert errors[0]["errors"][0].startswith("email:")
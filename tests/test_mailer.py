@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from email.message import EmailMessage
+from services.mailer import MailDispatcher
+from .smtp_stub import SMTPStub
+
+
+def _message(to: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = "Verify your account"
+    msg["From"] = "no-reply@example.com"
+    msg["To"] = to
+    msg.set_content("Click to verify")
+    return msg
+
+
+@pytest.mark.asyncio
+async def test_queued_mail_is_sent_over_pooled_connection():
+    async with SMTPStub() as smtp:
+        mailer = MailDispatcher(smtp.host, smtp.port, workers=1, start_tls=False)
+        for i in range(5):
+            await mailer.enqueue(_message(f"user{i}@example.com"))
+        await mailer.stop()
+
+    assert sorted(m["To"] for m in smtp.messages) == [
+        f"user{i}@example.com" for i in range(5)
+    ]
+    assert smtp.connections == 1
+    assert mailer.stats["sent"] == 5
+
+
+@pytest.mark.asyncio
+async def test_temporary_failure_is_retried():
+    async with SMTPStub() as smtp:
+        smtp.fail_next = 1
+        mailer = MailDispatcher(
+            smtp.host, smtp.port, workers=1, retry_base_delay=0.01, start_tls=False
+        )
+        await mailer.enqueue(_message("retry@example.com"))
+        while mailer.stats["sent"] == 0 and not mailer.dead_letters:
+            await asyncio.sleep(0.01)
+        await mailer.stop()
+
+    assert [m["To"] for m in smtp.messages] == ["retry@example.com"]
+    assert mailer.stats["retried"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unreachable_server_ends_in_dead_letters():
+    mailer = MailDispatcher(
+        "127.0.0.1", 1, workers=1, max_retries=0, start_tls=False
+    )
+    await mailer.enqueue(_message("dead@example.com"))
+    await mailer.stop()
+
+    assert [e.message["To"] for e in mailer.dead_letters] == ["dead@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_stop_gives_pending_retries_a_last_attempt():
+    async with SMTPStub() as smtp:
+        smtp.fail_next = 2
+        mailer = MailDispatcher(
+            smtp.host, smtp.port, workers=1, retry_base_delay=60, start_tls=False
+        )
+        await mailer.enqueue(_message("sent@example.com"))
+        await mailer.enqueue(_message("dead@example.com"))
+        while mailer.stats["retried"] < 2:
+            await asyncio.sleep(0.01)
+        # Обидва листи чекають хвилину на повтор; сервер уже відповідає
+        smtp.fail_next = 1
+        await mailer.stop()
+
+    # Один лист відправлено, другий (знову помилка) — у dead-letter, не втрачено
+    assert len(smtp.messages) == 1
+    assert len(mailer.dead_letters) == 1
+    assert mailer.stats["sent"] + mailer.stats["dead"] == 2
+    assert not mailer._dead_letter_tasks
@@ -0,0 +1,55 @@
+import jinja2
+import pytest
+from config import get_settings
+from prometheus_client import REGISTRY
+from services.metrics import TimedTemplate
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(get_settings(), "METRICS_TOKEN", "scrape-token")
+    return {"Authorization": "Bearer scrape-token"}
+
+
+@pytest.mark.asyncio
+async def test_metrics_use_route_templates(client, id_token, metrics_token):
+    await client.get("/contacts/edit/12345", cookies={"access_token": id_token})
+
+    response = await client.get("/metrics", headers=metrics_token)
+    assert response.status_code == 200
+    assert 'route="/contacts/edit/{contact_id}"' in response.text
+    assert "/contacts/edit/12345" not in response.text
+    assert "http_request_duration_seconds_bucket" in response.text
+
+
+@pytest.mark.asyncio
+async def test_metrics_require_token(client, metrics_token):
+    assert (await client.get("/metrics")).status_code == 401
+    response = await client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_metrics_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "METRICS_TOKEN", "")
+    assert (await client.get("/metrics")).status_code == 404
+
+
+def _render_count(name: str) -> float:
+    labels = {"template": name}
+    return REGISTRY.get_sample_value("template_render_seconds_count", labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_templates_are_timed():
+    env = jinja2.Environment(
+        loader=jinja2.DictLoader({"streamed.html": "{% for r in rows %}{{ r }}{% endfor %}"}),
+        enable_async=True,
+    )
+    env.template_class = TimedTemplate
+    before = _render_count("streamed.html")
+
+    chunks = [c async for c in env.get_template("streamed.html").generate_async(rows="ab")]
+
+    assert "".join(chunks) == "ab"
+    assert _render_count("streamed.html") == before + 1
@@ -0,0 +1,64 @@
+import pytest
+from datetime import date
+import crud
+from models import Contact, User
+
+
+async def _seed(db, count: int):
+    user = User(email="pager@example.com", hashed_password="x", is_verified=True)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    for i in range(count):
+        db.add(
+            Contact(
+                first_name=f"First{i % 3}",
+                last_name=f"Last{i % 5}",
+                email=f"pager{i}@example.com",
+                phone="123456",
+                date_of_birth=date(1990, 1, 1),
+                owner_id=user.id,
+            )
+        )
+    await db.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_all_contacts(db):
+    user = await _seed(db, 23)
+
+    seen, cursor, sizes = [], None, []
+    while True:
+        contacts, next_cursor, _ = await crud.list_contacts_page(
+            db, user.id, cursor=cursor, limit=5
+        )
+        sizes.append(len(contacts))
+        seen += [c.id for c in contacts]
+        if not next_cursor:
+            break
+        cursor = next_cursor
+
+    expected = [c.id for c in await crud.list_contacts(db, user.id)]
+    assert sizes == [5, 5, 5, 5, 3]
+    assert sorted(seen) == sorted(expected)
+
+
+@pytest.mark.asyncio
+async def test_prev_cursor_returns_previous_page(db):
+    user = await _seed(db, 12)
+
+    first, next_cursor, prev_cursor = await crud.list_contacts_page(db, user.id, limit=5)
+    assert prev_cursor is None
+
+    second, _, prev_cursor = await crud.list_contacts_page(
+        db, user.id, cursor=next_cursor, limit=5
+    )
+    back, _, _ = await crud.list_contacts_page(db, user.id, cursor=prev_cursor, limit=5)
+    assert [c.id for c in back] == [c.id for c in first]
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(Exception) as exc:
+        crud.decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from services import auth
+from services.auth import get_password_hash_async, verify_password_async
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_the_event_loop():
+    hashed, other = await asyncio.gather(
+        get_password_hash_async("StrongPass123!"),
+        get_password_hash_async("OtherPass123!"),
+    )
+    assert await verify_password_async("StrongPass123!", hashed)
+    assert not await verify_password_async("StrongPass123!", other)
+    assert auth.get_hash_pool_stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_returns_429():
+    saturated = {**auth._hash_stats, "pending": 10_000}
+    with patch.dict(auth._hash_stats, saturated):
+        with pytest.raises(HTTPException) as exc:
+            await get_password_hash_async("StrongPass123!")
+        assert auth._hash_stats["rejected"] == saturated["rejected"] + 1
+    assert exc.value.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_holds_slot_until_bcrypt_finishes():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+
+    pending = auth._hash_stats["pending"]
+    task = asyncio.ensure_future(auth._run_in_hash_pool(slow_hash))
+    await asyncio.to_thread(started.wait, 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # Запит скасовано, але потік bcrypt ще працює — місце в пулі зайняте
+    assert auth._hash_stats["pending"] == pending + 1
+
+    release.set()
+    for _ in range(100):
+        if auth._hash_stats["pending"] == pending:
+            break
+        await asyncio.sleep(0.01)
+    assert auth._hash_stats["pending"] == pending
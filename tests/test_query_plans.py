@@ -0,0 +1,76 @@
+import pytest
+from datetime import date
+from sqlalchemy import event, text
+import crud
+from models import Contact, User
+
+
+async def _explain(db, call):
+    """План (EXPLAIN) запиту, який виконує ``call``, з вимкненим seq scan"""
+    engine = db.get_bind()
+    if engine.dialect.name != "postgresql":
+        pytest.skip("query plans are checked on PostgreSQL only")
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        await call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = statements[-1]
+    # На малій тестовій таблиці seq scan дешевший; без нього планувальник
+    # покаже, чи є індекс, який обслуговує запит
+    await db.execute(text("SET enable_seqscan = off"))
+    connection = await (await db.connection()).get_raw_connection()
+    rows = await connection.driver_connection.fetch(
+        f"EXPLAIN {statement}", *parameters
+    )
+    await db.execute(text("RESET enable_seqscan"))
+    return "\n".join(row[0] for row in rows)
+
+
+async def _seed(db):
+    user = User(email="plans@example.com", hashed_password="x")
+    db.add(user)
+    await db.commit()
+    db.add_all(
+        Contact(
+            first_name=f"Plan{i}",
+            last_name=f"Query{i % 7}",
+            email=f"plan{i}@example.com",
+            phone="123456",
+            date_of_birth=date(1990, 1, 1),
+            owner_id=user.id,
+        )
+        for i in range(50)
+    )
+    await db.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_contact_page_uses_owner_name_index(db):
+    user = await _seed(db)
+    _, next_cursor, _ = await crud.list_contacts_page(db, user.id, limit=10)
+
+    for cursor in (None, next_cursor):
+        plan = await _explain(
+            db, lambda: crud.list_contacts_page(db, user.id, cursor=cursor, limit=10)
+        )
+        assert "ix_contacts_owner_name" in plan
+        assert "Seq Scan" not in plan
+        # Порядок дає індекс — без окремого сортування
+        assert "Sort" not in plan
+
+
+@pytest.mark.asyncio
+async def test_search_uses_index(db):
+    user = await _seed(db)
+    plan = await _explain(db, lambda: crud.search_contacts(db, "plan1", user.id))
+    assert "Seq Scan" not in plan
+    assert "Index" in plan
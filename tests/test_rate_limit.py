@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+from limits.storage import storage_from_string
+from middleware import rate_limit
+from middleware.rate_limit import LocalBudgetRedisStorage, client_ip, user_or_ip_key
+
+
+def _request(xff=None, host="10.0.0.1", claims=None):
+    headers = {"x-forwarded-for": xff} if xff else {}
+    return SimpleNamespace(
+        headers=headers,
+        client=SimpleNamespace(host=host),
+        state=SimpleNamespace(token_claims=claims) if claims else SimpleNamespace(),
+    )
+
+
+def test_client_ip_trusts_only_proxy_hops():
+    settings = SimpleNamespace(TRUSTED_PROXY_HOPS=1)
+    with patch.object(rate_limit, "get_settings", return_value=settings):
+        assert client_ip(_request("6.6.6.6, 203.0.113.7")) == "203.0.113.7"
+        assert client_ip(_request()) == "10.0.0.1"
+
+
+def test_authenticated_requests_are_limited_per_user():
+    assert user_or_ip_key(_request(claims={"sub": "42"})) == "user:42"
+    assert user_or_ip_key(_request()).startswith("ip:")
+
+
+def _budget_storage() -> LocalBudgetRedisStorage:
+    storage = storage_from_string("budget+redis://localhost:6379/0")
+    assert isinstance(storage, LocalBudgetRedisStorage)
+    storage.local_ratio = 0.1
+    return storage
+
+
+def test_local_budget_batches_redis_hits():
+    storage = _budget_storage()
+
+    with patch.object(storage, "_flush_and_acquire", return_value=50) as remote:
+        results = [
+            storage.acquire_sliding_window_entry("k", 100, 60) for _ in range(25)
+        ]
+
+    assert all(results)
+    # Перший запит — у Redis; далі 10 локально, і відкладені хіти йдуть разом з 12-м
+    assert [c.args[4] for c in remote.call_args_list] == [0, 10, 10]
+
+
+def test_no_local_budget_over_the_limit():
+    storage = _budget_storage()
+
+    with patch.object(storage, "_flush_and_acquire", return_value=-1) as remote:
+        results = [
+            storage.acquire_sliding_window_entry("k", 100, 60) for _ in range(5)
+        ]
+
+    # Після відмови Redis кожен запит перевіряється в Redis і відхиляється
+    assert results == [False] * 5
+    assert remote.call_count == 5
+
+
+def test_local_budget_is_capped_by_redis_headroom():
+    storage = _budget_storage()
+
+    with patch.object(storage, "_flush_and_acquire", side_effect=[2, -1]) as remote:
+        results = [
+            storage.acquire_sliding_window_entry("k", 100, 60) for _ in range(4)
+        ]
+
+    # Запас 2 — лише два локальні хіти, і вони записуються в Redis навіть при відмові
+    assert results == [True, True, True, False]
+    assert [c.args[4] for c in remote.call_args_list] == [0, 2]
+
+
+def test_window_keys_match_limits_layout():
+    # Скрипт і RedisStorage.get_sliding_window мають працювати з тими самими ключами
+    storage = _budget_storage()
+    assert storage._window_keys("k") == (
+        storage._previous_window_key("k"),
+        storage._current_window_key("k"),
+    )
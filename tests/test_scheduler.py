@@ -0,0 +1,172 @@
+import pytest
+from contextlib import asynccontextmanager
+from datetime import date
+from unittest.mock import AsyncMock, patch
+from cache import contact_cache
+from models import Contact, User
+from config import get_settings
+from services import scheduler
+import crud
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def eval(self, script, numkeys, key, token):
+        # RELEASE_LOCK_SCRIPT: видалення лише за збігу токена
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+async def _owner_with_contacts(db, email, birthdays):
+    user = User(email=email, hashed_password="x", is_verified=True)
+    db.add(user)
+    await db.commit()
+    for i, dob in enumerate(birthdays):
+        db.add(
+            Contact(
+                first_name=f"First{i}",
+                last_name=f"Last{i}",
+                email=f"{i}.{email}",
+                phone="123456",
+                date_of_birth=dob,
+                owner_id=user.id,
+            )
+        )
+    await db.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_birthdays_by_owner_keeps_users_without_matches(db):
+    today = date(2025, 6, 10)
+    ann = await _owner_with_contacts(
+        db, "ann.shard@example.com", [date(1990, 6, 12), date(1990, 8, 1)]
+    )
+    bob = await _owner_with_contacts(db, "bob.shard@example.com", [date(1985, 1, 1)])
+
+    rows = await crud.upcoming_birthdays_by_owner(db, ann.id, bob.id + 1, today, 7)
+
+    assert [(owner_id, c.date_of_birth if c else None) for owner_id, _, c in rows] == [
+        (ann.id, date(1990, 6, 12)),
+        (bob.id, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_digest_fills_birthdays_cache_once_per_day(db):
+    today = date.today()
+    user = await _owner_with_contacts(db, "digest@example.com", [today])
+    redis = FakeRedis()
+
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    with patch.object(scheduler, "get_session", return_value=session), patch.object(
+        scheduler, "get_redis_client", return_value=redis
+    ), patch.object(
+        contact_cache, "get_redis_client", return_value=redis
+    ), patch.object(
+        scheduler, "get_contacts_versions", AsyncMock(return_value={user.id: "1"})
+    ), patch.object(
+        contact_cache, "get_contacts_version", AsyncMock(return_value="1")
+    ):
+        contact_cache._local.clear()
+        assert await scheduler.run_birthday_digest(today) >= 1
+        # Шард уже позначено готовим — повторний прогін нічого не робить
+        assert await scheduler.run_birthday_digest(today) == 0
+
+        with patch("crud.upcoming_birthdays") as query:
+            found = await contact_cache.upcoming_birthdays(db, user.id, 7)
+        query.assert_not_called()
+        assert [c.email for c in found] == ["0.digest@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_expired_shard_lock_of_another_worker_is_kept():
+    day = date(2025, 6, 10)
+    redis = FakeRedis()
+    lock_key, _ = scheduler._shard_keys(day, 1)
+
+    async def slow_shard(start_id, end_id, day):
+        # Блокування прострочилось, і шард захопив інший воркер
+        redis.data[lock_key] = "other-worker"
+        return 0
+
+    @asynccontextmanager
+    async def session():
+        yield AsyncMock()
+
+    with patch.object(scheduler, "get_session", return_value=session), patch.object(
+        scheduler, "get_redis_client", return_value=redis
+    ), patch("crud.get_user_id_range", AsyncMock(return_value=(1, 1))), patch.object(
+        scheduler, "process_shard", slow_shard
+    ):
+        assert await scheduler.run_birthday_digest(day) == 1
+
+    assert redis.data[lock_key] == "other-worker"
+
+
+@pytest.mark.asyncio
+async def test_birthdays_page_reads_the_digest_period(client, id_token, monkeypatch):
+    monkeypatch.setattr(get_settings(), "BIRTHDAY_DIGEST_DAYS", 3)
+    cached = AsyncMock(return_value=[])
+
+    with patch.object(contact_cache, "upcoming_birthdays", cached):
+        response = await client.get(
+            "/contacts/birthdays/upcoming", cookies={"access_token": id_token}
+        )
+
+    assert response.status_code == 200
+    assert cached.await_args.kwargs["days"] == 3
+    assert "найближчі 3 днів" in response.text
+
+
+@pytest.mark.asyncio
+async def test_shard_reads_generations_before_birthdays(db):
+    user = await _owner_with_contacts(db, "order@example.com", [date.today()])
+    calls = []
+
+    async def versions(owner_ids):
+        calls.append("versions")
+        return {owner_id: "1" for owner_id in owner_ids}
+
+    query = crud.upcoming_birthdays_by_owner
+
+    async def birthdays(*args):
+        calls.append("birthdays")
+        return await query(*args)
+
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    with patch.object(scheduler, "get_session", return_value=session), patch.object(
+        scheduler, "get_contacts_versions", versions
+    ), patch("crud.upcoming_birthdays_by_owner", birthdays), patch.object(
+        scheduler, "store_upcoming_birthdays", AsyncMock()
+    ) as store:
+        assert await scheduler.process_shard(user.id, user.id + 1, date.today()) == 1
+
+    # Зміна контактів під час запиту збільшить покоління — запис під старим не читається
+    assert calls == ["versions", "birthdays"]
+    assert store.await_args.args[1] == "1"
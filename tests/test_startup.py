@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from database import check_schema_revision, get_migration_heads
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Бюджет холодного старту: імпорт main з усіма роутерами
+IMPORT_BUDGET_SECONDS = 3.0
+
+# Інтеграції, що мають імпортуватися лише при першому використанні
+LAZY_MODULES = ("cloudinary", "fastapi_mail", "aiosmtplib", "redis", "PIL", "alembic")
+
+
+def _import_main() -> dict[str, int]:
+    """``python -X importtime -c "import main"``: модуль -> кумулятивний час (мкс)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+@pytest.fixture(scope="module")
+def imported_modules():
+    return _import_main()
+
+
+def test_main_import_within_budget(imported_modules):
+    elapsed = imported_modules["main"] / 1_000_000
+    slowest = sorted(imported_modules.items(), key=lambda item: -item[1])[:10]
+    assert elapsed < IMPORT_BUDGET_SECONDS, f"import main: {elapsed:.2f}s, {slowest}"
+
+
+@pytest.mark.parametrize("package", LAZY_MODULES)
+def test_integrations_not_imported_at_startup(imported_modules, package):
+    loaded = [
+        name for name in imported_modules
+        if name == package or name.startswith(package + ".")
+    ]
+    assert not loaded, loaded
+
+
+def test_settings_not_loaded_at_import():
+    # .env читається у lifespan застосунку, а не як побічний ефект імпорту
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import config, main; print(config.get_settings.cache_info().currsize)",
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip() == "0"
+
+
+@pytest_asyncio.fixture
+async def test_engine():
+    # Тестова БД з conftest; без пулу — з'єднання не переживають event loop тесту
+    engine = create_async_engine(os.environ["DATABASE_URL"], poolclass=NullPool)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_schema_check_requires_migrations(test_engine):
+    # prepare_database створює таблиці без Alembic
+    with pytest.raises(RuntimeError, match="not migrated"):
+        await check_schema_revision(test_engine)
+
+
+@pytest.mark.asyncio
+async def test_schema_check_compares_revision(test_engine):
+    (head,) = get_migration_heads()
+    async with test_engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        await conn.execute(
+            text("CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)")
+        )
+        await conn.execute(text("INSERT INTO alembic_version VALUES ('0000')"))
+    try:
+        with pytest.raises(RuntimeError, match="does not match"):
+            await check_schema_revision(test_engine)
+
+        async with test_engine.begin() as conn:
+            await conn.execute(
+                text("UPDATE alembic_version SET version_num = :head"), {"head": head}
+            )
+        await check_schema_revision(test_engine)
+    finally:
+        async with test_engine.begin() as conn:
+            await conn.execute(text("DROP TABLE alembic_version"))
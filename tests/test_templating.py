@@ -0,0 +1,68 @@
+import jinja2
+import pytest
+import templating
+from templating import FragmentCacheExtension
+
+
+@pytest.fixture
+def env():
+    templating._fragments.clear()
+    return jinja2.Environment(
+        loader=jinja2.DictLoader(
+            {"rows.html": "{% cache key %}{% for r in rows %}<td>{{ r }}</td>{% endfor %}{% endcache %}"}
+        ),
+        autoescape=True,
+        extensions=[FragmentCacheExtension],
+    )
+
+
+def test_fragment_is_cached_per_key(env):
+    template = env.get_template("rows.html")
+
+    assert template.render(key="u1:g1", rows=["<a>"]) == "<td>&lt;a&gt;</td>"
+    # Ключ той самий — повертається збережений HTML, дані не рендеряться
+    assert template.render(key="u1:g1", rows=["b"]) == "<td>&lt;a&gt;</td>"
+    assert template.render(key="u1:g2", rows=["b"]) == "<td>b</td>"
+
+
+def test_fragment_without_key_is_not_cached(env):
+    template = env.get_template("rows.html")
+
+    assert template.render(key=None, rows=["a"]) == "<td>a</td>"
+    assert template.render(rows=["b"]) == "<td>b</td>"
+    assert not templating._fragments
+
+
+def test_templates_are_precompiled():
+    assert templating.precompile_templates() >= 1
+    assert "contacts.html" in templating.templates.env.list_templates()
+
+
+@pytest.mark.asyncio
+async def test_streamed_template_flushes_header_before_rows():
+    env = jinja2.Environment(
+        loader=jinja2.DictLoader(
+            {"t.html": "<table><tr><th>Name</th></tr>{{ flush }}{% for r in rows %}<tr><td>{{ r }}</td></tr>{% endfor %}</table>"}
+        ),
+        autoescape=True,
+        enable_async=True,
+    )
+    env.globals["flush"] = templating.FLUSH
+    events = []
+
+    async def rows():
+        for name in ("a", "b"):
+            events.append(f"row {name}")
+            yield name
+
+    async for chunk in templating._render_chunks(
+        env.get_template("t.html"), {"rows": rows()}
+    ):
+        events.append(chunk.decode())
+
+    assert events == [
+        "<table><tr><th>Name</th></tr>",
+        "row a",
+        "row b",
+        "<tr><td>a</td></tr><tr><td>b</td></tr></table>",
+    ]
@@ -0,0 +1,37 @@
+import pytest
+from unittest.mock import patch
+from jose import JWTError
+from services import auth
+from services.auth import create_access_token, decode_access_token_cached
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    auth._verified_tokens.clear()
+    yield
+    auth._verified_tokens.clear()
+
+
+def test_verified_token_is_decoded_once():
+    token = create_access_token(subject=1, role="user")
+    with patch.object(auth, "decode_access_token", wraps=auth.decode_access_token) as decode:
+        first = decode_access_token_cached(token)
+        second = decode_access_token_cached(token)
+    assert first is second
+    assert first["sub"] == "1"
+    assert decode.call_count <= 1
+
+
+def test_token_cache_is_bounded():
+    # Кеш, що вже більший за ліміт (напр. після його зменшення), теж зменшується
+    for i in range(5):
+        decode_access_token_cached(create_access_token(subject=100 + i, role="user"))
+    with patch.object(auth, "TOKEN_CACHE_SIZE", 2):
+        for i in range(5):
+            decode_access_token_cached(create_access_token(subject=i, role="user"))
+        assert len(auth._verified_tokens) <= 2
+
+
+def test_invalid_token_is_not_cached():
+    with pytest.raises(JWTError):
+        decode_access_token_cached("not.a.token")
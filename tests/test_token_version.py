@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import patch
+from cache import token_version
+from models import Role, User
+from services.auth import create_access_token, decode_access_token, user_token_claims
+from services.deps import get_token_user
+import crud
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value).encode()
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+
+@pytest.fixture
+def redis():
+    fake = FakeRedis()
+    with patch.object(token_version, "get_redis_client", return_value=fake):
+        token_version._local.clear()
+        yield fake
+
+
+async def _claims(db, email="tv@example.com") -> dict:
+    user = User(email=email, hashed_password="x", is_verified=True, role=Role.admin)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token(subject=user.id, **user_token_claims(user))
+    return decode_access_token(token)
+
+
+@pytest.mark.asyncio
+async def test_token_user_is_built_from_claims(db, redis):
+    claims = await _claims(db)
+    assert claims["tv"] == 0 and claims["role"] == "admin"
+
+    await get_token_user(db, claims)
+    # Версія вже в локальному кеші — далі без Redis і БД
+    with patch.object(db, "scalar") as query:
+        redis.data.clear()
+        user = await get_token_user(db, claims)
+    query.assert_not_called()
+    assert user.id == int(claims["sub"])
+    assert user.role == Role.admin and user.is_verified
+
+
+@pytest.mark.asyncio
+async def test_revoked_and_deleted_tokens_are_rejected(db, redis):
+    claims = await _claims(db)
+    user_id = int(claims["sub"])
+    assert await get_token_user(db, claims) is not None
+
+    assert await crud.revoke_user_tokens(db, user_id) == 1
+    assert await get_token_user(db, claims) is None
+
+    # Токен з новою версією дійсний, доки користувача не видалено
+    fresh = dict(claims, tv=1)
+    assert await get_token_user(db, fresh) is not None
+    await crud.delete_user(db, await db.get(User, user_id))
+    assert await get_token_user(db, fresh) is None
+
+
+@pytest.mark.asyncio
+async def test_token_without_version_or_role_claims(db, redis):
+    claims = await _claims(db)
+
+    # Без tv токен неможливо відкликати — він недійсний
+    legacy = {k: v for k, v in claims.items() if k != "tv"}
+    assert await get_token_user(db, legacy) is None
+
+    # role NULL у старих записах — звичайний користувач, а не 500
+    user = await get_token_user(db, dict(claims, role=None))
+    assert user.role == Role.user
+    assert user_token_claims(User(role=None, token_version=0))["role"] == "user"
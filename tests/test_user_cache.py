@@ -0,0 +1,54 @@
+import pytest
+from unittest.mock import patch
+from cache import user_cache
+from models import User, Role
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.mark.asyncio
+async def test_read_through_cache_serves_user_without_db(db):
+    user = User(
+        email="cached@example.com",
+        hashed_password="x",
+        is_active=True,
+        is_verified=True,
+        role=Role.admin,
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+
+    fake = FakeRedis()
+    with patch.object(user_cache, "get_redis_client", return_value=fake):
+        before = user_cache.get_cache_stats()
+        loaded = await user_cache.get_or_load_user(db, user.id)
+        assert loaded.id == user.id
+
+        cached = await user_cache.get_cached_user(user.id)
+        assert cached.email == "cached@example.com"
+        assert cached.role == Role.admin
+        assert "hashed_password" not in fake.data[user_cache._user_key(user.id)]
+
+        stats = user_cache.get_cache_stats()
+        assert stats["misses"] == before["misses"] + 1
+        assert stats["hits"] == before["hits"] + 1
+
+        await user_cache.delete_user_cache(user.id)
+        assert await user_cache.get_cached_user(user.id) is None
+
+
+def test_stale_cache_version_is_ignored():
+    assert user_cache.deserialize_user('{"v": 0, "id": 1}') is None